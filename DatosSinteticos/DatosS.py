@@ -1,32 +1,30 @@
-#importamos modulo y creamos un excel vacio
-import glob
-import pandas as pd
-import csv
-data_null={}
-df_null=pd.DataFrame(data_null)
-df_null.to_excel('DatosS.xlsx', index=False)
-
-from faker import Faker
-#Cargar y modificar el archivo 
-writer=pd.ExcelWriter('DatosS.xlsx') 
+#importamos modulos
+import os
+import sys
 
-fake=Faker('es-ES')
-personas = [fake.unique.name() for b in range(5000)]
+import pandas as pd
 
-fake=Faker('es-ES')
-empleados = [fake.unique.name() for b in range(5000)]
+#el paquete generador esta en la carpeta del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from generador.names import UniqueNameSampler
+from generador.writers import ExcelWriter
 
-fake=Faker('es-ES')
-bomberos = [fake.unique.name()  for b in range(5000)]
+#cantidad de nombres por rol
+num_nombres = 5000
 
-fake=Faker('es-ES')
-policia = [fake.unique.name() for b in range(5000)]
+#nombres es-ES de Faker sin reemplazo: ningun nombre se repite entre los cuatro roles
+sampler = UniqueNameSampler('es_ES')
 
-data1= {'Personas':[personas],'Empleados':[empleados],'Bomberos':[bomberos],'Policia':[policia]}
+data1 = sampler.sample_roles({
+    'Personas': num_nombres,
+    'Empleados': num_nombres,
+    'Bomberos': num_nombres,
+    'Policia': num_nombres,
+})
 
+#una fila por nombre y una columna por rol
 df1 = pd.DataFrame(data1)
 
-df1.to_excel(writer,'Hoja 1',index=False)
-
-writer.save()
-writer.close()
\ No newline at end of file
+#el excel se escribe fila por fila, sin cargar todo el libro en memoria
+with ExcelWriter('DatosS.xlsx', sheet_name='Hoja 1') as writer:
+    writer.write(df1)
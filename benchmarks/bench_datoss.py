@@ -0,0 +1,41 @@
+"""
+Benchmark of the DatosSinteticos/DatosS.py flow: four disjoint es_ES name
+lists written to one xlsx sheet.
+"""
+import os
+import tempfile
+
+import pandas as pd
+
+from generador.names import UniqueNameSampler
+from generador.writers import ExcelWriter
+
+ROLES = ["Personas", "Empleados", "Bomberos", "Policia"]
+
+
+class DatosS:
+    """
+    Name sampling and Excel export, rows per role.
+    """
+
+    params = [10_000, 100_000, 1_000_000]
+    param_names = ["rows"]
+
+    def setup(self, rows):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "DatosS.xlsx")
+
+    def teardown(self, rows):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rmdir(self.tmp)
+
+    def time_sample_names(self, rows):
+        UniqueNameSampler("es_ES", seed=0).sample_roles({role: rows for role in ROLES})
+
+    def time_excel_flow(self, rows):
+        sampler = UniqueNameSampler("es_ES", seed=0)
+        df = pd.DataFrame(sampler.sample_roles({role: rows for role in ROLES}))
+
+        with ExcelWriter(self.path, sheet_name="Hoja 1") as writer:
+            writer.write(df)
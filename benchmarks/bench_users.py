@@ -0,0 +1,141 @@
+"""
+Benchmarks of every column generator of the users dataset (datos.py).
+
+Written as asv benchmarks (params, setup, time_*); benchmarks/run.py runs
+them without asv.
+"""
+import datetime
+import os
+import tempfile
+
+from generador.bios import BioEngine
+from generador.columns import ColumnEngine
+from generador.education import classify_education
+from generador.emails import DOMAIN, email_bases
+from generador.ids import id_column, random_uuid_bytes
+from generador.names import NamePools
+from generador.pipeline import (
+    DOB_END,
+    DOB_START,
+    GENDER_WEIGHTS,
+    GENDERS,
+    LOGIN_END,
+    LOGIN_START,
+    RATING_WEIGHTS,
+    RATINGS,
+    UsersGenerator,
+)
+from generador.timestamps import random_dates, random_datetimes
+from generador.unique import UniqueAllocator
+from generador.writers import write_chunks
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+NOW = datetime.datetime(2021, 8, 24)
+
+
+class Columns:
+    """
+    One benchmark per column, from id to rating.
+    """
+
+    params = SIZES
+    param_names = ["rows"]
+
+    def setup(self, rows):
+        self.engine = ColumnEngine(seed=0)
+        self.name_pools = NamePools.load("en_US")
+        self.bio_engine = BioEngine("en_US")
+
+        # Inputs of the columns that depend on others
+        self.gender = self.engine.categorical(GENDERS, rows, weights=GENDER_WEIGHTS)
+        self.subscriber = self.engine.boolean(rows)
+        self.names = self.name_pools.full_names(self.engine.rng, self.gender)
+        self.dob = random_dates(self.engine.rng, DOB_START, DOB_END, rows)
+
+    def time_ids(self, rows):
+        id_column(random_uuid_bytes(self.engine.rng, rows))
+
+    def time_gender(self, rows):
+        self.engine.categorical(GENDERS, rows, weights=GENDER_WEIGHTS)
+
+    def time_subscriber(self, rows):
+        self.engine.boolean(rows)
+
+    def time_name_gen(self, rows):
+        self.name_pools.full_names(self.engine.rng, self.gender)
+
+    def time_emailGen(self, rows):
+        allocator = UniqueAllocator()
+        for base in email_bases(self.engine.rng, self.names):
+            allocator.allocate(base, suffix=DOMAIN)
+
+    def time_randomtimes(self, rows):
+        random_datetimes(self.engine.rng, LOGIN_START, LOGIN_END, rows)
+
+    def time_random_dob(self, rows):
+        random_dates(self.engine.rng, DOB_START, DOB_END, rows)
+
+    def time_getEducation(self, rows):
+        classify_education(self.dob, NOW)
+
+    def time_makeBio(self, rows):
+        self.bio_engine.bios(self.engine.rng, self.subscriber)
+
+    def time_rating(self, rows):
+        self.engine.integer(RATINGS, rows, weights=RATING_WEIGHTS)
+
+
+class Export:
+    """
+    Writing an already generated dataset.
+    """
+
+    params = SIZES
+    param_names = ["rows"]
+
+    def setup(self, rows):
+        generator = UsersGenerator(seed=0, now=NOW)
+        self.df = generator.chunk(rows)
+        self.tmp = tempfile.mkdtemp()
+
+    def teardown(self, rows):
+        for name in os.listdir(self.tmp):
+            os.remove(os.path.join(self.tmp, name))
+        os.rmdir(self.tmp)
+
+    def time_to_csv(self, rows):
+        write_chunks([self.df], os.path.join(self.tmp, "users.csv"))
+
+    def time_to_sqlite(self, rows):
+        write_chunks([self.df], os.path.join(self.tmp, "users.db"))
+
+
+class Pipeline:
+    """
+    End to end: every column plus the CSV export, in chunks.
+    """
+
+    params = SIZES
+    param_names = ["rows"]
+
+    def setup(self, rows):
+        self.tmp = tempfile.mkdtemp()
+
+    def teardown(self, rows):
+        for name in os.listdir(self.tmp):
+            os.remove(os.path.join(self.tmp, name))
+        os.rmdir(self.tmp)
+
+    def time_generate_csv(self, rows):
+        generator = UsersGenerator(seed=0, now=NOW)
+        write_chunks(generator.chunks(rows), os.path.join(self.tmp, "users.csv"))
+
+    def time_generate_parquet_background(self, rows):
+        generator = UsersGenerator(seed=0, now=NOW)
+        write_chunks(
+            generator.chunks(rows, chunk_size=max(1, rows // 10)),
+            os.path.join(self.tmp, "users.parquet"),
+            background=True,
+            row_group_size=max(1, rows // 10),
+        )
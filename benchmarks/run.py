@@ -0,0 +1,229 @@
+"""
+Runs the asv-style benchmarks without asv and checks them against a baseline.
+
+Every case runs in a fresh process. Results (best wall time, rows per
+second, and the peak RSS the timed call adds over what setup() left) are
+compared with the stored baseline and the run fails when a case is slower
+or bigger than allowed. Baselines depend on the machine, so none is
+committed: --check makes a missing baseline (or case) a failure too.
+
+    python -m benchmarks.run                      # all cases, all sizes
+    python -m benchmarks.run --sizes 10000 -k Columns
+    python -m benchmarks.run --save               # store a new baseline
+    python -m benchmarks.run --check              # fail without a baseline
+"""
+import argparse
+import importlib
+import inspect
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["benchmarks.bench_users", "benchmarks.bench_datoss"]
+
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+
+def discover():
+    """
+    (name, sizes) of every time_* benchmark, named module.Class.method.
+    """
+    cases = []
+    for module_name in MODULES:
+        module = importlib.import_module(module_name)
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module_name:
+                continue
+            for method in sorted(vars(cls)):
+                if method.startswith("time_"):
+                    short = module_name.split(".")[-1]
+                    cases.append(("%s.%s.%s" % (short, cls_name, method), list(cls.params)))
+
+    return cases
+
+
+def _proc_status_mb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+
+    raise OSError("no %s in /proc/self/status" % field)
+
+
+def _max_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class _PeakRss:
+    """
+    Peak RSS added by a block over the RSS it started with.
+
+    On Linux the peak (VmHWM) is reset before the block, so whatever setup()
+    allocated does not hide it. Elsewhere it is the growth of ru_maxrss,
+    which misses a block that stays below an earlier peak.
+    """
+
+    def __enter__(self):
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+            self.start = _proc_status_mb("VmRSS")
+            self._peak = lambda: _proc_status_mb("VmHWM")
+        except OSError:
+            self.start = _max_rss_mb()
+            self._peak = _max_rss_mb
+
+        return self
+
+    def __exit__(self, *exc):
+        self.mb = max(0.0, self._peak() - self.start)
+
+
+def run_case(name, rows, repeat):
+    """
+    Runs one case in this process. Returns its measurements.
+    """
+    short, cls_name, method = name.split(".")
+    module = importlib.import_module("benchmarks." + short)
+    bench = getattr(module, cls_name)()
+
+    times = []
+    peaks = []
+    for _ in range(repeat):
+        bench.setup(rows)
+        try:
+            with _PeakRss() as peak:
+                start = time.perf_counter()
+                getattr(bench, method)(rows)
+                times.append(time.perf_counter() - start)
+            peaks.append(peak.mb)
+        finally:
+            if hasattr(bench, "teardown"):
+                bench.teardown(rows)
+
+    best = min(times)
+
+    return {
+        "seconds": best,
+        "rows_per_sec": rows / best if best else float("inf"),
+        "peak_rss_mb": max(peaks),
+    }
+
+
+def run_isolated(name, rows, repeat):
+    """
+    Runs one case in a child process.
+    """
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--child", name, str(rows), str(repeat)],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# Differences below these are treated as noise
+MIN_DELTA = {"seconds": 0.05, "peak_rss_mb": 10.0}
+
+
+def compare(results, baseline, tolerance, strict=False):
+    """
+    Cases slower or bigger than their baseline by more than tolerance, and
+    with strict the cases missing from it.
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            if strict:
+                regressions.append("%s: not in the baseline" % key)
+            continue
+        for metric in ("seconds", "peak_rss_mb"):
+            limit = baseline[key][metric] * (1 + tolerance)
+            delta = result[metric] - baseline[key][metric]
+            if result[metric] > limit and delta > MIN_DELTA[metric]:
+                regressions.append(
+                    "%s: %s %.3f > %.3f (baseline %.3f)"
+                    % (key, metric, result[metric], limit, baseline[key][metric])
+                )
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-k", "--filter", default="", help="regex on case names")
+    parser.add_argument("--sizes", help="comma separated row counts, default: each case's params")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative slowdown / growth, default 0.25")
+    parser.add_argument("--check", action="store_true",
+                        help="fail when the baseline or a case in it is missing")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        name, rows, repeat = args.child
+        print(json.dumps(run_case(name, int(rows), int(repeat))))
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",")] if args.sizes else None
+
+    results = {}
+    for name, params in discover():
+        if not re.search(args.filter, name):
+            continue
+        for rows in sizes or params:
+            key = "%s[%d]" % (name, rows)
+            result = run_isolated(name, rows, args.repeat)
+            results[key] = result
+            print(
+                "%-45s %10.3fs %14.0f rows/s %9.1f MB"
+                % (key, result["seconds"], result["rows_per_sec"], result["peak_rss_mb"])
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print("baseline saved to %s" % args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("no baseline at %s, run with --save to create one" % args.baseline)
+        return 1 if args.check else 0
+
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance, strict=args.check)
+
+    for line in regressions:
+        print("REGRESSION " + line)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
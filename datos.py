@@ -62,9 +62,7 @@
    "outputs": [],
    "source": [
     "import pandas as pd\n",
-    "import uuid\n",
     "import random\n",
-    "from faker import Faker\n",
     "import datetime"
    ]
   },
@@ -94,6 +92,23 @@
     "num_users = 5000"
    ]
   },
+  {
+   "cell_type": "code",
+   "execution_count": null,
+   "id": "c3ab2913",
+   "metadata": {},
+   "outputs": [],
+   "source": [
+    "from generador.columns import ColumnEngine\n",
+    "\n",
+    "# Seed of every random choice in the notebook\n",
+    "seed = 42\n",
+    "random.seed(seed)\n",
+    "\n",
+    "# Seeded engine that generates whole columns with numpy\n",
+    "engine = ColumnEngine(seed=seed)\n"
+   ]
+  },
   {
    "cell_type": "markdown",
    "id": "4f8ba686",
@@ -181,7 +196,7 @@
    "id": "57be8b83",
    "metadata": {},
    "source": [
-    "Para el atributo ID, utilicé la biblioteca uuid para generar una cadena aleatoria de caracteres 100 000 veces. Luego, lo asigné al atributo ID en el marco de datos."
+    "Para el atributo ID, generé identificadores UUID versión 4 (los mismos que `uuid.uuid4()`) directamente como un búfer de 16 bytes por usuario con `generador/ids.py`, en lugar de un objeto UUID y una cadena hexadecimal de 32 caracteres por fila. Luego, lo asigné al atributo ID en el marco de datos como una columna binaria de ancho fijo de Arrow (`fixed_size_binary(16)`)."
    ]
   },
   {
@@ -191,7 +206,12 @@
    "metadata": {},
    "outputs": [],
    "source": [
-    "df['id'] = [uuid.uuid4().hex for i in range(num_users)]"
+    "from generador.ids import count_duplicates, id_column, random_uuid_bytes\n",
+    "\n",
+    "# 16 bytes per id in one contiguous buffer\n",
+    "raw_ids = random_uuid_bytes(engine.rng, num_users)\n",
+    "\n",
+    "df['id'] = id_column(raw_ids)"
    ]
   },
   {
@@ -199,7 +219,7 @@
    "id": "92e30db5",
    "metadata": {},
    "source": [
-    "**UUID es una gran biblioteca para generar identificaciones únicas para cada usuario debido a su posibilidad astronómicamente baja de duplicar una identificación.** Es una gran opción cuando se trata de generar conjuntos de caracteres de identificación únicos. Pero, si desea asegurarse de que no se repitieron las ID, puede realizar una verificación simple en el marco de datos con lo siguiente:"
+    "**Los UUID son una gran opción para generar identificaciones únicas para cada usuario debido a su posibilidad astronómicamente baja de duplicar una identificación.** Pero, si desea asegurarse de que no se repitieron las ID, puede realizar una verificación simple sobre los valores de 128 bits, sin convertirlos a texto:"
    ]
   },
   {
@@ -217,7 +237,7 @@
     }
    ],
    "source": [
-    "print(df['id'].nunique()==num_users)"
+    "print(count_duplicates(raw_ids) == 0)"
    ]
   },
   {
@@ -263,10 +283,10 @@
    "metadata": {},
    "outputs": [],
    "source": [
-    "df['gender'] = random.choices(\n",
+    "df['gender'] = engine.categorical(\n",
     "    genders, \n",
-    "    weights=(47,47,6), \n",
-    "    k=num_users\n",
+    "    num_users,\n",
+    "    weights=(47,47,6)\n",
     ")"
    ]
   },
@@ -275,7 +295,7 @@
    "id": "9744528c",
    "metadata": {},
    "source": [
-    "Al usar la biblioteca aleatoria, proporcioné la función de opciones/choices () con la lista de opciones de género, pesos para cada opción y cuántas opciones hacer representadas por \"k\". Luego se asignó al atributo de \"género\" del marco de datos. El desequilibrio que describí antes está representado en la sección de ponderaciones con una opción \"na\" que aparece aproximadamente el 6% de las veces."
+    "Usé `ColumnEngine` (`generador/columns.py`), creado al principio con la semilla del cuaderno, que genera la columna completa de una vez con un `numpy.random.Generator`. Le proporcioné la lista de opciones de género, cuántas opciones generar y los pesos de cada opción. El resultado es una columna `pd.Categorical` (códigos `int8`), sin un objeto de Python por fila. El desequilibrio que describí antes está representado en la sección de ponderaciones con una opción \"na\" que aparece aproximadamente el 6% de las veces."
    ]
   },
   {
@@ -301,11 +321,7 @@
    "metadata": {},
    "outputs": [],
    "source": [
-    "choice = [True, False]\n",
-    "df['subscriber'] = random.choices(\n",
-    "    choice, \n",
-    "    k=num_users\n",
-    ")"
+    "df['subscriber'] = engine.boolean(num_users)"
    ]
   },
   {
@@ -313,7 +329,7 @@
    "id": "734bcb93",
    "metadata": {},
    "source": [
-    "Al igual que \"Género\" antes, usé random.choices() pero sin pesos porque este atributo se puede dividir aleatoriamente entre las dos opciones."
+    "Al igual que \"Género\" antes, usé el motor de columnas pero sin pesos porque este atributo se puede dividir aleatoriamente entre las dos opciones. El resultado es una columna `bool`."
    ]
   },
   {
@@ -329,7 +345,7 @@
    "id": "f5a065c3",
    "metadata": {},
    "source": [
-    "Aquí usé la biblioteca Faker para crear miles de nombres para todos estos usuarios. **La biblioteca Faker es excelente en esta situación porque tiene una opción para nombres masculinos y femeninos.**}} Para procesar los nombres de género, creé una función para asignar nombres en función de un género determinado."
+    "Aquí usé la biblioteca Faker para crear miles de nombres para todos estos usuarios. **La biblioteca Faker es excelente en esta situación porque tiene una opción para nombres masculinos y femeninos.**}} Para no pasar por los proveedores de Faker en cada fila, `NamePools` (`generador/names.py`) extrae una sola vez los nombres masculinos, femeninos y los apellidos de Faker (con sus pesos), los guarda en disco y arma los nombres completos muestreando índices para toda la columna de género."
    ]
   },
   {
@@ -339,20 +355,20 @@
    "metadata": {},
    "outputs": [],
    "source": [
-    "# Instantiating faker\n",
-    "faker = Faker()\n",
+    "from generador.names import NamePools\n",
+    "\n",
+    "# First and last name pools from Faker's vocabularies, cached on disk\n",
+    "name_pools = NamePools.load(\"en_US\")\n",
     "\n",
     "def name_gen(gender):\n",
     "    \"\"\"\n",
-    "    Quickly generates a name based on gender\n",
+    "    Quickly generates names for a whole column of genders\n",
     "    \"\"\"\n",
-    "    if gender=='male':\n",
-    "        return faker.name_male()\n",
-    "    elif gender=='female':\n",
-    "        return faker.name_female()\n",
-    "    \n",
-    "    return faker.name()# Generating names for each user\n",
-    "df['name'] = [name_gen(i) for i in df['gender']]"
+    "    # Male and female pools, the mixed pool for any other value\n",
+    "    return name_pools.full_names(engine.rng, gender)\n",
+    "\n",
+    "# Generating names for each user\n",
+    "df['name'] = name_gen(df['gender'])"
    ]
   },
   {
@@ -360,7 +376,7 @@
    "id": "fbbe6fc8",
    "metadata": {},
    "source": [
-    "Usé mi función simple para producir rápidamente una lista de nombres basada en los datos del atributo \"Género\" antes y la asigné al marco de datos."
+    "Usé mi función para producir de una vez los nombres basados en los datos del atributo \"Género\" y los asigné al marco de datos."
    ]
   },
   {
@@ -378,7 +394,7 @@
    "source": [
     "El correo electrónico resultó ser uno de los atributos más complicados. Quería crear direcciones de correo electrónico relacionadas con los nombres generados. Sin embargo, probablemente habría una posibilidad de duplicación porque las personas pueden compartir el mismo nombre pero no el mismo correo electrónico.\n",
     "\n",
-    "Primero, creé una nueva función que daría formato a los nombres en direcciones de correo electrónico con un nombre de dominio predeterminado. También manejaría direcciones duplicadas simplemente agregando un número aleatorio al final del nombre formateado:"
+    "Primero, creé una nueva función que daría formato a los nombres en direcciones de correo electrónico con un nombre de dominio predeterminado. Las direcciones duplicadas se resuelven con `UniqueAllocator` (`generador/unique.py`), que guarda las direcciones ya usadas en un conjunto (búsqueda O(1)) y agrega al final del nombre formateado un contador propio de cada nombre en lugar de un número aleatorio:"
    ]
   },
   {
@@ -388,10 +404,12 @@
    "metadata": {},
    "outputs": [],
    "source": [
-    "def emailGen(name, duplicateFound=False):\n",
+    "from generador.unique import UniqueAllocator\n",
+    "\n",
+    "def emailGen(name, allocator):\n",
     "    \"\"\"\n",
     "    Generates a random email address based on the given name. \n",
-    "    Adds a number at the end if a duplicate address was found.\n",
+    "    Adds a number at the end if the address was already allocated.\n",
     "    \"\"\"\n",
     "    # Fake domain name to use\n",
     "    dom = \"@fakemail.com\"\n",
@@ -404,17 +422,8 @@
     "    \n",
     "    new_name = name[0] + random.choice(chars) + name[1] \n",
     "    \n",
-    "    # Further distinguishing the email if a duplicate was found\n",
-    "    if duplicateFound:\n",
-    "        \n",
-    "        # Random number to insert at the end\n",
-    "        num = random.randint(0,100)\n",
-    "        \n",
-    "        # Inserting at the end\n",
-    "        new_name = new_name + str(num)\n",
-    "        \n",
-    "    # Returning the email address with the domain name attached\n",
-    "    return new_name + dom"
+    "    # The allocator appends a per-name counter when the address is taken\n",
+    "    return allocator.allocate(new_name, suffix=dom)\n"
    ]
   },
   {
@@ -422,7 +431,7 @@
    "id": "c488a9f8",
    "metadata": {},
    "source": [
-    "Ahora, para aprovechar adecuadamente el propósito de esta función, creé un ciclo que volvería a ejecutar la función cuando fuera necesario mientras iteraba a través del atributo \"Nombre\". El ciclo seguiría volviendo a ejecutar la función hasta que se creara un nombre de correo electrónico único."
+    "Ahora, para aprovechar adecuadamente el propósito de esta función, recorrí el atributo \"Nombre\" pasando el mismo asignador a cada llamada. Como el asignador usa un contador por nombre, cada correo se obtiene en una sola pasada, sin reintentos aleatorios, y al final muestra las estadísticas de colisiones."
    ]
   },
   {
@@ -432,23 +441,12 @@
    "metadata": {},
    "outputs": [],
    "source": [
-    "emails = []\n",
+    "# Hash index of the emails already handed out\n",
+    "email_allocator = UniqueAllocator()\n",
     "\n",
-    "for name in df['name']:\n",
-    "    \n",
-    "    # Generating the email\n",
-    "    email = emailGen(name)\n",
-    "    \n",
-    "    # Looping until a unique email is generated\n",
-    "    while email in emails:\n",
-    "        \n",
-    "        # Creating an email with a random number\n",
-    "        email = emailGen(name, duplicateFound=True)\n",
-    "    \n",
-    "    # Attaching the new email to the list\n",
-    "    emails.append(email)\n",
-    "    \n",
-    "df['email'] = emails"
+    "df['email'] = [emailGen(name, email_allocator) for name in df['name']]\n",
+    "\n",
+    "print(email_allocator.stats())\n"
    ]
   },
   {
@@ -482,13 +480,19 @@
    "metadata": {},
    "outputs": [],
    "source": [
-    "def randomtimes(start, end, n):\n",
+    "from generador.timestamps import random_datetimes, random_dates\n",
+    "\n",
+    "def randomtimes(start, end, n, vectorized=True):\n",
     "    \"\"\"\n",
     "    Generates random time stamps based on a given amount between two time periods.\n",
     "    \"\"\"\n",
     "    # The timestamp format\n",
     "    frmt = \"%Y-%m-%d %H:%M:%S\"\n",
     "    \n",
+    "    # Native datetime64[s] column, formatted only when exported\n",
+    "    if vectorized:\n",
+    "        return random_datetimes(engine.rng, start, end, n, frmt=frmt)\n",
+    "    \n",
     "    # Formatting the two time periods\n",
     "    stime = datetime.datetime.strptime(start, frmt)\n",
     "    etime = datetime.datetime.strptime(end, frmt)\n",
@@ -514,7 +518,7 @@
    "id": "fb2b963d",
    "metadata": {},
    "source": [
-    "La función básicamente genera una lista de marcas de tiempo entre dos horas dadas. Generó una lista de marcas de tiempo aleatorias para asignar al marco de datos."
+    "La función básicamente genera una lista de marcas de tiempo entre dos horas dadas. Por defecto genera todos los desplazamientos de una vez con numpy y devuelve una columna nativa `datetime64[s]`; el texto solo se produce al exportar (`to_csv` usa el mismo formato `%Y-%m-%d %H:%M:%S`). Con `vectorized=False` se conserva el ciclo original que devuelve cadenas."
    ]
   },
   {
@@ -540,7 +544,7 @@
    "metadata": {},
    "outputs": [],
    "source": [
-    "def random_dob(start, end, n):\n",
+    "def random_dob(start, end, n, vectorized=True):\n",
     "    \"\"\"\n",
     "    Generating a list of a set number of timestamps\n",
     "    \"\"\"\n",
@@ -548,6 +552,10 @@
     "    # The timestamp format\n",
     "    frmt = \"%Y-%m-%d\"\n",
     "    \n",
+    "    # Native datetime64[D] column, formatted only when exported\n",
+    "    if vectorized:\n",
+    "        return random_dates(engine.rng, start, end, n, frmt=frmt)\n",
+    "    \n",
     "    # Formatting the two time periods\n",
     "    stime = datetime.datetime.strptime(start, frmt)\n",
     "    etime = datetime.datetime.strptime(end, frmt)\n",
@@ -578,7 +586,7 @@
    "source": [
     "El atributo \"educación\" depende de \"dob\". En estos casos, el nivel de educación se basa en la edad del usuario y no en el nivel de educación más alto que alcanzó. Este es otro de esos atributos en los que elegir aleatoriamente un nivel de educación no reflejaría las tendencias del mundo real.\n",
     "\n",
-    "Creé otra función simple que verifica la edad de un usuario según la fecha de hoy y devuelve su nivel de educación actual."
+    "Creé otra función que recibe la columna \"dob\" completa, calcula todas las edades de una vez respecto a una única fecha de referencia (así el resultado no cambia si la ejecución cruza la medianoche) y las clasifica en una sola pasada con `np.digitize`."
    ]
   },
   {
@@ -588,30 +596,21 @@
    "metadata": {},
    "outputs": [],
    "source": [
-    "def getEducation(dob):\n",
+    "from generador.education import classify_education\n",
+    "\n",
+    "def getEducation(dob, now=None):\n",
     "    \"\"\"\n",
-    "    Assigns an education level based on the given date of birth\n",
+    "    Assigns an education level to a whole column of dates of birth\n",
     "    \"\"\"\n",
-    "    # Current date\n",
-    "    now = datetime.datetime.now()\n",
-    "    \n",
-    "    # Date of birth\n",
-    "    dob = datetime.datetime.strptime(dob, \"%Y-%m-%d\")\n",
+    "    # A single reference date for every row\n",
+    "    if now is None:\n",
+    "        now = datetime.datetime.now()\n",
     "    \n",
-    "    # Subtracting the times to get an age\n",
-    "    age = int((now - dob).days/365.25)\n",
-    "    \n",
-    "    # Returning education level based on age\n",
-    "    if age <= 18:\n",
-    "        return 'high school'\n",
-    "    elif age <= 22:\n",
-    "        return 'undergrad'\n",
-    "    elif age <= 25:\n",
-    "        return 'grad'\n",
-    "    else:\n",
-    "        return 'employed'\n",
+    "    # Ages computed at once and binned into\n",
+    "    # 'high school' (<=18), 'undergrad' (<=22), 'grad' (<=25) and 'employed'\n",
+    "    return classify_education(dob, now)\n",
     "\n",
-    "df['education'] = [getEducation(i) for i in df['dob']]"
+    "df['education'] = getEducation(df['dob'])"
    ]
   },
   {
@@ -619,7 +618,7 @@
    "id": "b1570a1c",
    "metadata": {},
    "source": [
-    "Después de generar una lista de niveles de educación, la asigné al marco de datos."
+    "Después de generar la columna de niveles de educación, de tipo categórico, la asigné al marco de datos."
    ]
   },
   {
@@ -637,7 +636,7 @@
    "source": [
     "Para este atributo, quería variar la longitud de la biografía según el estado de suscripción del usuario. Si un usuario fuera un suscriptor, asumiría que sus biografías serían más largas que las de los no suscriptores.\n",
     "\n",
-    "Para dar cabida a este aspecto, construí una función que verifica su estado de suscripción y devuelve una oración aleatoria de Faker que varía en longitud."
+    "Para dar cabida a este aspecto, construí una función que recibe toda la columna de suscripción y devuelve oraciones aleatorias que varían en longitud. En lugar de llamar a `faker.sentence()` por fila, `BioEngine` (`generador/bios.py`) sortea todas las longitudes de una vez y arma las oraciones con índices sobre la lista de palabras de Faker, copiándolas a un único búfer."
    ]
   },
   {
@@ -647,25 +646,22 @@
    "metadata": {},
    "outputs": [],
    "source": [
+    "from generador.bios import BioEngine\n",
+    "\n",
+    "# Lorem words of faker, cached as an array\n",
+    "bio_engine = BioEngine(\"en_US\")\n",
+    "\n",
     "def makeBio(subscriber):\n",
     "    \"\"\"\n",
-    "    Making a short or long bio depending their subscription status.\n",
+    "    Making short or long bios for a whole column of subscription statuses.\n",
     "    \"\"\"\n",
-    "    \n",
-    "    if subscriber==True:\n",
-    "        \n",
-    "        # Randomizing bio length but skewed towards longer bios\n",
-    "        bio_len = random.choices([10,20], weights=(10,90), k=1)[0]\n",
-    "        \n",
-    "    elif subscriber==False:\n",
-    "        \n",
-    "        # Randomizing bio length but skewed towards shorter bios\n",
-    "        bio_len = random.choices([1,3], weights=(10,90), k=1)[0]\n",
-    "        \n",
-    "    return faker.sentence(bio_len)\n",
+    "    # Subscribers are skewed towards longer bios (10 or 20 words) and\n",
+    "    # non-subscribers towards shorter ones (1 or 3 words), with the same\n",
+    "    # +/-40% variation faker.sentence() applies\n",
+    "    return bio_engine.bios(engine.rng, subscriber)\n",
     "    \n",
     "\n",
-    "df['bio'] = [makeBio(i) for i in df['subscriber']]"
+    "df['bio'] = makeBio(df['subscriber'])"
    ]
   },
   {
@@ -673,7 +669,7 @@
    "id": "153d8103",
    "metadata": {},
    "source": [
-    "En la función anterior, elegí aleatoriamente la longitud de las oraciones falsas según el estado de la suscripción. Si eran suscriptores, sus biografías tendían a ser más largas de lo habitual y viceversa."
+    "En la función anterior, elegí aleatoriamente la longitud de las oraciones falsas según el estado de la suscripción. Si eran suscriptores, sus biografías tendían a ser más largas de lo habitual y viceversa. Con `as_arrow=True` el resultado es un arreglo de cadenas de Arrow que comparte ese búfer, en lugar de millones de objetos `str` de Python."
    ]
   },
   {
@@ -703,10 +699,10 @@
    "source": [
     "# The different ratings available\n",
     "ratings = [1,2,3,4,5]# Weighted ratings with a skew towards the ends\n",
-    "df['rating'] = random.choices(\n",
+    "df['rating'] = engine.integer(\n",
     "    ratings, \n",
-    "    weights=(30,10,10,10,30), \n",
-    "    k=num_users\n",
+    "    num_users,\n",
+    "    weights=(30,10,10,10,30)\n",
     ")"
    ]
   },
@@ -715,7 +711,7 @@
    "id": "b15041c3",
    "metadata": {},
    "source": [
-    "Usé la función random.choices() una vez más pero con los pesos sesgados hacia 1 y 5."
+    "Usé el motor de columnas una vez más pero con los pesos sesgados hacia 1 y 5. La columna resultante es de tipo `int8`."
    ]
   },
   {
@@ -731,7 +727,7 @@
    "id": "743e5aed",
    "metadata": {},
    "source": [
-    "Ahora que los datos están completos y si estaba codificando, siéntase libre de ver el marco de datos antes de decidir guardarlo. Si todo se ve bien, guarde el marco de datos como un archivo .csv con este simple comando:"
+    "Ahora que los datos están completos y si estaba codificando, siéntase libre de ver el marco de datos antes de decidir guardarlo. Si todo se ve bien, guarde el marco de datos como un archivo .csv con este simple comando (las ID se escriben como texto hexadecimal solo al exportar):"
    ]
   },
   {
@@ -741,7 +737,291 @@
    "metadata": {},
    "outputs": [],
    "source": [
-    "df.to_csv('dataset_users.csv')"
+    "from generador.writers import write_chunks\n",
+    "\n",
+    "# The ids are rendered as hex text here, at export time\n",
+    "write_chunks([df], 'dataset_users.csv')"
+   ]
+  },
+  {
+   "cell_type": "markdown",
+   "id": "14cc5971",
+   "metadata": {},
+   "source": [
+    "**Sin Jupyter**\n",
+    "\n",
+    "Las funciones de este cuaderno (`name_gen`, `emailGen`, `randomtimes`, `random_dob`, `getEducation` y `makeBio`) también están en `generador/datos.py` y se pueden importar desde el paquete (`from generador import makeBio`), y el conjunto de datos completo se puede generar desde la línea de comandos, por ejemplo desde cron, con `datos generate --rows 5000 --format csv` (o `python -m generador generate ...`). pandas y Faker solo se cargan cuando un comando los necesita, así que `datos --help` y `datos schema` responden al instante.\n"
+   ]
+  },
+  {
+   "cell_type": "markdown",
+   "id": "d4303dfe",
+   "metadata": {},
+   "source": [
+    "**Generación por bloques**\n",
+    "\n",
+    "Para conjuntos de datos que no caben en memoria, `generador/pipeline.py` genera los usuarios en bloques de tamaño fijo que pasan por todas las columnas (de \"id\" a \"rating\") y se agregan al archivo apenas se producen. Los índices de \"id\" y \"email\" se comparten entre bloques, así que ambas columnas siguen siendo únicas en todo el archivo.\n",
+    "\n",
+    "En máquinas con varios núcleos, `generate_parallel` de `generador/parallel.py` reparte los bloques entre procesos (`ProcessPoolExecutor`). Cada bloque recibe una semilla derivada de la semilla maestra y de su número de bloque, y los bloques se unen en orden, así que el archivo es el mismo sin importar cuántos procesos se usen.\n",
+    "\n",
+    "El formato de salida se elige por la extensión del archivo (o con `format=`): además de CSV y xlsx, `generador/writers.py` escribe Parquet y Arrow IPC (Feather), que guardan los tipos de cada columna y codifican como diccionario las columnas categóricas, sin tener que volver a interpretar texto después. Con `background=True`, cada bloque se escribe en un hilo aparte mientras se genera el siguiente; la cola entre ambos guarda a lo sumo dos bloques, así que la memoria no crece si el disco es más lento que la generación.\n",
+    "\n",
+    "Para saber qué etapa es la más lenta sin usar un perfilador, `Metrics` (`generador/instrument.py`) mide cada columna y la exportación: tiempo, filas por segundo, memoria asignada (con `tracemalloc`) y colisiones de correos. Muestra una barra de progreso mientras se genera y guarda todo como un informe JSON."
+   ]
+  },
+  {
+   "cell_type": "code",
+   "execution_count": null,
+   "id": "25504fef",
+   "metadata": {},
+   "outputs": [],
+   "source": [
+    "from generador.instrument import Metrics\n",
+    "from generador.pipeline import generate\n",
+    "\n",
+    "# Progress bar plus wall time, rows/s and allocations of every column\n",
+    "metrics = Metrics(total_rows=num_users, progress=True, trace_memory=True)\n",
+    "\n",
+    "# Same features, written 1000 rows at a time\n",
+    "generate('dataset_users_stream.csv', num_users, chunk_size=1000, seed=42, metrics=metrics)\n",
+    "\n",
+    "metrics.write_json('metrics_users.json')\n",
+    "\n",
+    "# Columnar output, with the categorical columns dictionary encoded, written\n",
+    "# on a background thread while the next chunks are generated\n",
+    "generate('dataset_users.parquet', num_users, chunk_size=1000, seed=42, background=True)"
+   ]
+  },
+  {
+   "cell_type": "markdown",
+   "id": "f22b9293",
+   "metadata": {},
+   "source": [
+    "**Esquema declarativo**\n",
+    "\n",
+    "Las dependencias entre columnas (el nombre depende del género, el correo del nombre, la educación de \"dob\" y la biografía de la suscripción) también se pueden declarar en un esquema. `USERS_SCHEMA` (`generador/schema.py`) describe cada columna con su generador, pesos, tipo y dependencias; `compile_schema` lo convierte en un plan por niveles que genera en paralelo las columnas independientes y omite las que no se piden ni se necesitan. Un esquema nuevo se puede escribir como un diccionario o en un archivo YAML (`load_schema`).\n"
+   ]
+  },
+  {
+   "cell_type": "code",
+   "execution_count": null,
+   "id": "4aabb0cc",
+   "metadata": {},
+   "outputs": [],
+   "source": [
+    "from generador.schema import USERS_SCHEMA, compile_schema\n",
+    "from generador.writers import write_chunks\n",
+    "\n",
+    "# Only email and rating are kept; gender and name are generated because email needs them\n",
+    "plan = compile_schema(USERS_SCHEMA, columns=[\"email\", \"rating\"], seed=42)\n",
+    "print(plan.levels)\n",
+    "\n",
+    "write_chunks(plan.chunks(num_users, chunk_size=1000), 'dataset_emails.csv')\n"
+   ]
+  },
+  {
+   "cell_type": "markdown",
+   "id": "7e94bca5",
+   "metadata": {},
+   "source": [
+    "**Acceso directo a cualquier fila**\n",
+    "\n",
+    "Con la misma semilla, el cuaderno vuelve a generar el mismo conjunto de datos, pero para recuperar la fila 3 000 000 habría que generar todas las anteriores. `CounterGenerator` (`generador/seeding.py`) usa un generador Philox por columna con la clave (semilla, columna) y una cantidad fija de números aleatorios por fila, así que cualquier fila o rango de filas se regenera de forma independiente e idéntica, sin guardar el archivo completo. Como las filas no se ven entre sí, en este modo el número de fila se agrega a cada correo, lo que los hace únicos por construcción, y la edad se calcula respecto a una fecha fija.\n"
+   ]
+  },
+  {
+   "cell_type": "code",
+   "execution_count": null,
+   "id": "b51b446b",
+   "metadata": {},
+   "outputs": [],
+   "source": [
+    "from generador.seeding import CounterGenerator\n",
+    "\n",
+    "users = CounterGenerator(seed=42)\n",
+    "\n",
+    "# The same rows every time, without generating the ones before them\n",
+    "users.rows(3_000_000, 3_000_005)\n"
+   ]
+  },
+  {
+   "cell_type": "markdown",
+   "id": "604c707e",
+   "metadata": {},
+   "source": [
+    "**Agregar usuarios a un archivo existente**\n",
+    "\n",
+    "Para hacer crecer un CSV ya generado no hace falta volver a generarlo. `append` (`generador/append.py`) guarda junto al archivo un índice compacto (`dataset_users_stream.csv.index.npz`) con huellas de 64 bits de todos los ids y correos ya escritos, el número de filas y el estado del generador aleatorio. En cada llamada genera solo las filas nuevas, comprueba sus ids y correos contra el índice y las agrega al final del archivo, así que aumentar un archivo de 10 millones de filas en un 1% cuesta aproximadamente un 1% de generarlo. Si el índice no existe o el archivo cambió, se reconstruye una vez leyendo las columnas \"id\" y \"email\".\n"
+   ]
+  },
+  {
+   "cell_type": "code",
+   "execution_count": null,
+   "id": "7eb6e14e",
+   "metadata": {},
+   "outputs": [],
+   "source": [
+    "from generador.append import append\n",
+    "\n",
+    "# 1% more users, generating only the new rows\n",
+    "append('dataset_users_stream.csv', num_users // 100)\n"
+   ]
+  },
+  {
+   "cell_type": "markdown",
+   "id": "25e12f5d",
+   "metadata": {},
+   "source": [
+    "**Índice de unicidad en disco**\n",
+    "\n",
+    "Para conjuntos de miles de millones de filas, los ids y correos ya usados no caben en memoria. Con `unique_index` (`generador/diskindex.py`), `generate` guarda huellas de 64 bits de los ids y correos en una tabla hash mapeada en memoria dentro de ese directorio: cada comprobación toma tiempo constante, solo las páginas en uso ocupan RAM y el índice se conserva entre ejecuciones, así que dos archivos generados con el mismo directorio no comparten ids ni correos. `FingerprintSet(..., bloom_error=0.01)` agrega además un filtro de Bloom delante de la tabla.\n"
+   ]
+  },
+  {
+   "cell_type": "code",
+   "execution_count": null,
+   "id": "5158908e",
+   "metadata": {},
+   "outputs": [],
+   "source": [
+    "# Ids and emails are also unique with respect to every earlier run using 'indice_usuarios'\n",
+    "generate('dataset_users_more.csv', num_users, chunk_size=1000, unique_index='indice_usuarios')\n"
+   ]
+  },
+  {
+   "cell_type": "markdown",
+   "id": "a9e75d5d",
+   "metadata": {},
+   "source": [
+    "**Columnas correlacionadas**\n",
+    "\n",
+    "La educación depende de la edad, la longitud de la biografía de la suscripción y el correo del nombre. En lugar de programar cada relación fila por fila, `generador/joint.py` las declara como tablas de probabilidad condicional (`Conditional`): los pesos de cada valor para cada valor del padre, o para cada rango de edad. `USERS_JOINT` (`generador/pipeline.py`) reúne las tablas del conjunto de datos; cada tabla se muestrea de una vez por grupo de filas con los mismos pesos, así que agregar una correlación nueva, por ejemplo que los suscriptores califiquen mejor, no agrega ningún ciclo por fila.\n"
+   ]
+  },
+  {
+   "cell_type": "code",
+   "execution_count": null,
+   "id": "68a54cf2",
+   "metadata": {},
+   "outputs": [],
+   "source": [
+    "from generador.pipeline import RATING_BY_SUBSCRIBER, USERS_JOINT, UsersGenerator\n",
+    "\n",
+    "# Same columns, with P(rating | subscriber) instead of a single rating distribution\n",
+    "joint = USERS_JOINT.replace(rating=RATING_BY_SUBSCRIBER)\n",
+    "sample = UsersGenerator(seed=42, joint=joint).chunk(num_users)\n",
+    "\n",
+    "pd.crosstab(sample['subscriber'], sample['rating'], normalize='index')\n"
+   ]
+  },
+  {
+   "cell_type": "markdown",
+   "id": "5634330d",
+   "metadata": {},
+   "source": [
+    "**Carga en SQLite**\n",
+    "\n",
+    "Para usar los datos en una base de datos no hace falta un script propio de `INSERT` fila por fila. `SqliteWriter` (`generador/writers.py`, elegido por las extensiones `.db`, `.sqlite` y `.sqlite3`) crea una tabla `users` con un tipo por columna (INTEGER, TEXT, BLOB para los ids binarios) y carga los bloques con `executemany` en transacciones grandes, con `journal_mode` y `synchronous` desactivados durante la carga. La clave primaria (\"id\") y el índice único de \"email\" se crean al final, una sola vez sobre toda la tabla, así que cargar 10 millones de usuarios toma minutos.\n"
+   ]
+  },
+  {
+   "cell_type": "code",
+   "execution_count": null,
+   "id": "9bf84b2b",
+   "metadata": {},
+   "outputs": [],
+   "source": [
+    "import sqlite3\n",
+    "\n",
+    "# The notebook's DataFrame, replacing the table of an earlier run\n",
+    "write_chunks([df], 'dataset_users.db', if_exists='replace')\n",
+    "\n",
+    "with sqlite3.connect('dataset_users.db') as db:\n",
+    "    print(db.execute('SELECT education, COUNT(*) FROM users GROUP BY education').fetchall())\n"
+   ]
+  },
+  {
+   "cell_type": "markdown",
+   "id": "5903f975",
+   "metadata": {},
+   "source": [
+    "**Tabla de inicios de sesión**\n",
+    "\n",
+    "\"last_login\" guarda solo el último inicio de sesión de cada usuario. Para pruebas de carga de la base de datos, `generador/logins.py` genera la tabla de hechos `logins(user_id, ts)`: cada usuario tiene una cantidad de inicios de sesión tomada de una distribución de Poisson (los suscriptores entran más seguido), ordenados entre el 1 y el 24 de agosto, y el último coincide con su \"last_login\". Todo se genera con numpy por bloques de a lo sumo dos millones de eventos, así que 100 millones de eventos se generan sin que crezca la memoria. `generate_logins` escribe los usuarios y sus inicios de sesión en dos archivos a la vez.\n"
+   ]
+  },
+  {
+   "cell_type": "code",
+   "execution_count": null,
+   "id": "6c0ccccc",
+   "metadata": {},
+   "outputs": [],
+   "source": [
+    "from generador.logins import LoginEvents\n",
+    "\n",
+    "# Every login of the notebook's users; the last one of each user is its last_login\n",
+    "logins = pd.concat(LoginEvents(seed=seed).frames(df))\n",
+    "write_chunks([logins], 'dataset_logins.csv')\n",
+    "\n",
+    "logins.head()\n"
+   ]
+  },
+  {
+   "cell_type": "markdown",
+   "id": "41f5c96a",
+   "metadata": {},
+   "source": [
+    "**Tablas relacionadas**\n",
+    "\n",
+    "`DatosSinteticos/DatosS.py` genera cuatro listas de nombres independientes (Personas, Empleados, Bomberos y Policía) y este cuaderno una tabla de usuarios sin relación con ellas. `generador/relational.py` las genera como tablas relacionadas: las tablas de nombres tienen una clave entera \"id\" (de 1 al número de filas), la tabla de usuarios conserva el \"id\" uuid del dataset de usuarios, ya que ninguna tabla apunta a ella, y las tablas hijas tienen una clave foránea a su tabla padre (empleado → persona, bombero y policía → empleado, usuario → persona). Cada clave foránea se calcula a partir del número de fila, con una permutación de las claves del padre cuando la relación es uno a uno, así que siempre apunta a una fila existente y no hace falta un join para comprobarlo. La cantidad de filas de cada tabla se configura en `TABLES`, lo que permite generar bases de datos consistentes de decenas de millones de filas para pruebas de rendimiento de joins.\n"
+   ]
+  },
+  {
+   "cell_type": "code",
+   "execution_count": null,
+   "id": "451d0a1b",
+   "metadata": {},
+   "outputs": [],
+   "source": [
+    "import sqlite3\n",
+    "\n",
+    "from generador.relational import TABLES, generate_relational\n",
+    "\n",
+    "# Same links, ten times fewer rows per table\n",
+    "tables = {name: dict(spec, rows=spec['rows'] // 10) for name, spec in TABLES.items()}\n",
+    "generate_relational('dataset_relacional.db', tables, seed=seed, writer_options={'if_exists': 'replace'})\n",
+    "\n",
+    "with sqlite3.connect('dataset_relacional.db') as db:\n",
+    "    print(db.execute(\n",
+    "        'SELECT p.nombre, COUNT(*) FROM users u JOIN personas p ON p.id = u.persona_id '\n",
+    "        'GROUP BY p.id ORDER BY COUNT(*) DESC LIMIT 3'\n",
+    "    ).fetchall())\n"
+   ]
+  },
+  {
+   "cell_type": "markdown",
+   "id": "dc2ea982",
+   "metadata": {},
+   "source": [
+    "**Columnas virtuales**\n",
+    "\n",
+    "La columna `email` es el nombre en minúsculas, un separador y, si la dirección ya existía, un número; la columna `education` depende solo de `dob`. Con `lazy=True`, `UsersGenerator` no guarda esas columnas como cadenas: de cada email conserva el código del separador (int8) y el número asignado (int32), y la educación se calcula desde `dob` cuando se lee. El resultado es un `LazyFrame`: al leer una columna devuelve una `Series` como un DataFrame, `materialize()` devuelve un DataFrame completo, y los escritores lo convierten en bloques de `SLICE_ROWS` filas, así que la columna de texto entera nunca existe en memoria. El archivo generado es idéntico.\n"
+   ]
+  },
+  {
+   "cell_type": "code",
+   "execution_count": null,
+   "id": "7cb64346",
+   "metadata": {},
+   "outputs": [],
+   "source": [
+    "from generador.pipeline import UsersGenerator\n",
+    "\n",
+    "eager = UsersGenerator(seed=42).chunk(num_users)\n",
+    "lazy = UsersGenerator(seed=42, lazy=True).chunk(num_users)\n",
+    "\n",
+    "print(eager.memory_usage(deep=True).sum() // 1024, 'KiB ->', lazy.memory_usage() // 1024, 'KiB')\n",
+    "print(lazy.materialize().equals(eager))\n"
    ]
   },
   {
@@ -0,0 +1,38 @@
+"""
+Helpers for building the synthetic users dataset of datos.py at scale.
+
+The notebook's column functions and the main entry points are available
+from the package itself; the modules behind them, and numpy, pandas and
+Faker, are only imported on first use.
+"""
+import importlib
+
+_EXPORTS = {
+    "name_gen": "generador.datos",
+    "emailGen": "generador.datos",
+    "randomtimes": "generador.datos",
+    "random_dob": "generador.datos",
+    "getEducation": "generador.datos",
+    "makeBio": "generador.datos",
+    "seed": "generador.datos",
+    "generate": "generador.pipeline",
+    "generate_parallel": "generador.parallel",
+    "compile_schema": "generador.schema",
+    "USERS_SCHEMA": "generador.schema",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,6 @@
+"""
+python -m generador: same as the datos command.
+"""
+from generador.cli import main
+
+main()
@@ -0,0 +1,170 @@
+"""
+Incremental growth of an existing users CSV without regenerating it.
+
+Next to the output lives a compact index (<output>.index.npz): sorted
+64-bit fingerprints of every id and email already written, the number of
+rows and the random state to continue from. append() loads it (or
+rebuilds it once by scanning the file), generates only the new rows,
+checks their ids and emails against it and appends them to the file.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from generador.diskindex import fingerprint, fingerprints, id_fingerprints
+from generador.ids import IdIndex, SortedFingerprints, id_bytes
+from generador.pipeline import DEFAULT_CHUNK_SIZE, UniqueColumns, UsersGenerator
+from generador.writers import write_chunks
+
+
+def index_path(path):
+    """
+    Where the index of an output file is kept.
+    """
+    return path + ".index.npz"
+
+
+class AppendIndex:
+    """
+    Fingerprints of the ids and emails of an output file, and how to continue it.
+    """
+
+    def __init__(self, ids=None, emails=None, rows=0, size=0, rng_state=None):
+        self.ids = ids or SortedFingerprints()
+        self.emails = emails or SortedFingerprints()
+        self.rows = rows
+
+        # Size of the file when the index was saved, to detect stale indexes
+        self.size = size
+
+        self.rng_state = rng_state
+
+    @classmethod
+    def load(cls, path):
+        """
+        Index of an output file, or None if missing or out of date.
+        """
+        ipath = index_path(path)
+        if not os.path.exists(ipath):
+            return None
+
+        with np.load(ipath, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            index = cls(
+                SortedFingerprints(data["ids"]),
+                SortedFingerprints(data["emails"]),
+                meta["rows"],
+                meta["size"],
+                meta["rng_state"],
+            )
+
+        if index.size != os.path.getsize(path):
+            return None
+
+        return index
+
+    @classmethod
+    def rebuild(cls, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Index built by scanning the id and email columns of a CSV file.
+        """
+        index = cls()
+        ids = []
+        emails = []
+
+        for chunk in pd.read_csv(path, usecols=["id", "email"], dtype=str, chunksize=chunk_size):
+            ids.append(id_fingerprints(id_bytes(chunk["id"])))
+            emails.append(fingerprints(chunk["email"]))
+            index.rows += len(chunk)
+
+        if ids:
+            index.ids.add_fingerprints(np.concatenate(ids))
+            index.emails.add_fingerprints(np.concatenate(emails))
+        index.size = os.path.getsize(path)
+
+        return index
+
+    def save(self, path):
+        meta = {"rows": self.rows, "size": os.path.getsize(path), "rng_state": self.rng_state}
+
+        # Writing next to the target first so readers never see half a file
+        tmp = index_path(path) + ".tmp.npz"
+        np.savez(tmp, ids=self.ids.values, emails=self.emails.values, meta=json.dumps(meta))
+        os.replace(tmp, index_path(path))
+
+
+class _IndexedIds:
+    """
+    IdIndex that also treats the ids of the existing file as taken.
+    """
+
+    def __init__(self, persisted):
+        self.persisted = persisted
+        self.run = IdIndex()
+
+    def add(self, raw):
+        return self.persisted.contains(id_fingerprints(raw)) | self.run.add(raw)
+
+
+class _IndexedUniqueColumns(UniqueColumns):
+    """
+    UniqueColumns checking new rows against the index of the existing file.
+    """
+
+    def __init__(self, rng, index, binary_ids=None):
+        super().__init__(rng, binary_ids, taken=lambda value: fingerprint(value) in index.emails)
+
+        self.ids = _IndexedIds(index.ids)
+
+
+def append(path, num_users, seed=None, chunk_size=DEFAULT_CHUNK_SIZE, metrics=None, **kwargs):
+    """
+    Appends num_users new users to an existing CSV output.
+
+    Only the new rows are generated. Returns the total number of rows.
+    """
+    if not path.lower().endswith(".csv"):
+        raise ValueError("append only supports CSV outputs, got %r" % path)
+
+    index = AppendIndex.load(path) or AppendIndex.rebuild(path)
+
+    generator = UsersGenerator(seed=seed, metrics=metrics, **kwargs)
+    if index.rng_state is not None and seed is None:
+        # Continuing the random stream of the previous run
+        generator.engine.rng.bit_generator.state = index.rng_state
+    generator.unique = _IndexedUniqueColumns(generator.engine.rng, index, generator.binary_ids)
+
+    new_ids = []
+    new_emails = []
+
+    def chunks():
+        for offset in range(0, num_users, chunk_size):
+            n = min(chunk_size, num_users - offset)
+            chunk = generator.chunk(n, index.rows + offset)
+
+            new_ids.append(id_fingerprints(id_bytes(chunk["id"])))
+            new_emails.append(fingerprints(chunk["email"]))
+            yield chunk
+
+    write_chunks(chunks(), path, "csv", metrics=metrics, append=True)
+
+    if new_ids:
+        index.ids.add_fingerprints(np.concatenate(new_ids))
+        index.emails.add_fingerprints(np.concatenate(new_emails))
+    index.rows += num_users
+    index.rng_state = generator.engine.rng.bit_generator.state
+    index.save(path)
+
+    return index.rows
+
+
+def build_index(path):
+    """
+    Creates or refreshes the index of an existing CSV output.
+    """
+    index = AppendIndex.rebuild(path)
+    index.save(path)
+
+    return index
@@ -0,0 +1,139 @@
+"""
+Bulk generation of lorem bios with the same shape as faker.sentence().
+
+All the words of a batch are drawn at once as indices into a cached word
+array and copied into a single UTF-8 buffer, which can be handed to Arrow
+as a string array without creating a Python str per row.
+"""
+import functools
+
+import numpy as np
+
+from generador.joint import Conditional
+
+# Bio lengths (in words) and their weights for subscribers and non-subscribers
+BIO_LENGTHS = {True: ([10, 20], (10, 90)), False: ([1, 3], (10, 90))}
+
+
+@functools.lru_cache(maxsize=None)
+def lorem_words(locale="en_US"):
+    """
+    Faker's lorem word list for the locale, as a tuple.
+    """
+    from faker import Faker
+
+    fake = Faker(locale)
+    for provider in fake.providers:
+        if type(provider).__module__.startswith("faker.providers.lorem"):
+            return tuple(provider.word_list)
+
+    raise ValueError("no lorem provider for locale %r" % locale)
+
+
+class BioEngine:
+    """
+    Sentences of lorem words, built a whole column at a time.
+    """
+
+    def __init__(self, locale="en_US", lengths=BIO_LENGTHS):
+        words = lorem_words(locale)
+        # P(length | subscriber), see generador.joint
+        if not isinstance(lengths, Conditional):
+            lengths = Conditional.from_choices("subscriber", lengths, dtype=np.int64)
+        self.lengths = lengths
+        self.n_words = len(words)
+
+        # Table of tokens: every word followed by a space, then the same
+        # words titled, for the start of a sentence
+        tokens = [(w + " ").encode("utf-8") for w in words]
+        tokens += [(w.title() + " ").encode("utf-8") for w in words]
+
+        self._token_len = np.array([len(t) for t in tokens], dtype=np.int64)
+        self._token_start = np.concatenate(([0], np.cumsum(self._token_len)[:-1]))
+        self._buffer = np.frombuffer(b"".join(tokens), dtype=np.uint8)
+
+    def nb_words(self, rng, subscriber):
+        """
+        Words per bio: the length for the subscription status, varied by
+        +/-40% (minimum of 1) like faker.sentence() does.
+        """
+        subscriber = np.asarray(subscriber, dtype=bool)
+        base = self.lengths.sample(rng, subscriber)
+
+        factor = rng.integers(60, 141, size=len(base))
+
+        return np.maximum(base * factor // 100, 1)
+
+    def sentence_buffers(self, rng, nb_words):
+        """
+        (offsets, data) of the UTF-8 encoded sentences, Arrow style.
+        """
+        nb_words = np.asarray(nb_words, dtype=np.int64)
+        ids = rng.integers(0, self.n_words, size=int(nb_words.sum()))
+
+        return self.assemble(nb_words, ids)
+
+    def assemble(self, nb_words, ids):
+        """
+        (offsets, data) of the sentences made of the given word indices,
+        nb_words[i] consecutive indices for sentence i.
+        """
+        nb_words = np.asarray(nb_words, dtype=np.int64)
+        n = len(nb_words)
+
+        # The first word of every sentence is taken from the titled half
+        ids = np.array(ids, dtype=np.int64)
+        starts = np.concatenate(([0], np.cumsum(nb_words)[:-1]))
+        ids[starts[nb_words > 0]] += self.n_words
+
+        # Gathering every token into one contiguous buffer
+        lens = self._token_len[ids]
+        out_start = np.cumsum(lens) - lens
+        src = np.repeat(self._token_start[ids] - out_start, lens)
+        src += np.arange(len(src))
+        data = self._buffer[src]
+
+        # Sentence ends, where the trailing space becomes the final period
+        ends = np.zeros(n, dtype=np.int64)
+        if len(ids):
+            sizes = np.add.reduceat(lens, starts[nb_words > 0])
+            ends[nb_words > 0] = sizes
+        ends = np.cumsum(ends)
+        data[ends[nb_words > 0] - 1] = ord(".")
+
+        offsets = np.concatenate(([0], ends))
+
+        return offsets, data
+
+    def sentences(self, rng, nb_words, as_arrow=False):
+        """
+        One sentence per entry of nb_words.
+
+        Returns a list of str, or a pyarrow large_string array sharing the
+        generated buffer when as_arrow is set.
+        """
+        return self.render(*self.sentence_buffers(rng, nb_words), as_arrow=as_arrow)
+
+    @staticmethod
+    def render(offsets, data, as_arrow=False):
+        """
+        Sentences of (offsets, data) buffers, as str or as an Arrow array.
+        """
+        if as_arrow:
+            import pyarrow as pa
+
+            return pa.LargeStringArray.from_buffers(
+                len(offsets) - 1, pa.py_buffer(offsets), pa.py_buffer(data)
+            )
+
+        text = data.tobytes()
+        return [
+            text[start:end].decode("utf-8")
+            for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())
+        ]
+
+    def bios(self, rng, subscriber, as_arrow=False):
+        """
+        Short or long bios depending on the subscription status.
+        """
+        return self.sentences(rng, self.nb_words(rng, subscriber), as_arrow)
@@ -0,0 +1,226 @@
+"""
+Command line interface: datos generate | schema | append.
+
+Only the standard library is imported up front; numpy, pandas and Faker
+are loaded by the command that needs them, so --help and the schema
+listing start at once.
+"""
+import argparse
+import sys
+
+from generador.writers import EXTENSIONS, WRITERS, output_format
+
+
+def _output(args):
+    """
+    Output path: the given one, or dataset_users with the format's extension.
+    """
+    if args.output:
+        return args.output
+
+    extension = {fmt: ext for ext, fmt in reversed(list(EXTENSIONS.items()))}[args.format or "csv"]
+
+    return "dataset_users" + extension
+
+
+def _positive(value):
+    """
+    argparse type of --rows: an integer above zero.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError("expected a positive integer, got %r" % value)
+
+    return number
+
+
+def _metrics(args):
+    if not (args.progress or args.metrics):
+        return None
+
+    from generador.instrument import Metrics
+
+    return Metrics(
+        total_rows=args.rows, progress=args.progress,
+        trace_memory=args.trace_memory,
+    )
+
+
+def _writer_options(args):
+    # Only SQLite outputs take --if-exists, see _check_generate
+    return {} if args.if_exists is None else {"if_exists": args.if_exists}
+
+
+def _binary_ids(args):
+    # Binary by default (raw bytes without pyarrow), hex text on request
+    return False if args.hex_ids else None
+
+
+def _schema(args):
+    from generador.schema import USERS_SCHEMA, load_schema
+
+    return load_schema(args.schema) if args.schema else USERS_SCHEMA
+
+
+def _check_generate(parser, args):
+    """
+    Rejects the options that the chosen generation path would ignore.
+    """
+    if args.schema or args.columns:
+        given = [
+            option for option, value in [
+                ("--workers", args.workers), ("--locale", args.locale),
+                ("--hex-ids", args.hex_ids), ("--unique-index", args.unique_index),
+            ] if value
+        ]
+        if given:
+            parser.error("%s cannot be used with --schema or --columns" % ", ".join(given))
+
+    if args.bloom_error is not None and not args.unique_index:
+        parser.error("--bloom-error needs --unique-index")
+
+    if args.trace_memory and not args.metrics:
+        parser.error("--trace-memory needs --metrics")
+
+    # Checked before anything is generated
+    try:
+        format = output_format(_output(args), args.format)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    if args.if_exists is not None and format != "sqlite":
+        parser.error("--if-exists is only for SQLite outputs")
+
+
+def generate(args):
+    path = _output(args)
+    metrics = _metrics(args)
+    options = {} if args.chunk_size is None else {"chunk_size": args.chunk_size}
+
+    if args.schema or args.columns:
+        from generador.schema import compile_schema
+        from generador.writers import write_chunks
+
+        columns = args.columns.split(",") if args.columns else None
+        plan = compile_schema(_schema(args), columns, seed=args.seed)
+        rows = write_chunks(
+            plan.chunks(args.rows, **options), path, args.format, metrics=metrics,
+            background=args.background, **_writer_options(args)
+        )
+    elif args.workers and args.workers > 1:
+        from generador.parallel import generate_parallel
+
+        if args.chunk_size is not None:
+            options = {"shard_size": args.chunk_size}
+        rows = generate_parallel(
+            path, args.rows, args.format, seed=args.seed, workers=args.workers,
+            metrics=metrics, background=args.background, locale=args.locale or "en_US",
+            binary_ids=_binary_ids(args), unique_index=args.unique_index,
+            bloom_error=args.bloom_error, writer_options=_writer_options(args), **options
+        )
+    else:
+        from generador.pipeline import generate as generate_users
+
+        rows = generate_users(
+            path, args.rows, args.format, seed=args.seed, metrics=metrics,
+            background=args.background, locale=args.locale or "en_US",
+            binary_ids=_binary_ids(args), unique_index=args.unique_index,
+            bloom_error=args.bloom_error, writer_options=_writer_options(args), **options
+        )
+
+    if metrics is not None and args.metrics:
+        metrics.write_json(args.metrics)
+
+    print("%d rows written to %s" % (rows, path))
+
+
+def schema(args):
+    spec = _schema(args)
+
+    print(spec.get("name", "schema"))
+    for name, column in spec["columns"].items():
+        depends = column.get("depends_on")
+        line = "  %-12s %-12s%s%s" % (
+            name,
+            column["generator"],
+            " unique" if column.get("unique") else "",
+            " <- " + ", ".join(depends) if depends else "",
+        )
+        print(line.rstrip())
+
+
+def append(args):
+    from generador.append import append as append_users
+
+    options = {} if args.chunk_size is None else {"chunk_size": args.chunk_size}
+    rows = append_users(args.path, args.rows, seed=args.seed, metrics=_metrics(args), **options)
+
+    print("%s now has %d rows" % (args.path, rows))
+
+
+def parser():
+    main_parser = argparse.ArgumentParser(
+        prog="datos", description="Synthetic users dataset generator."
+    )
+    commands = main_parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="generate the users dataset into a file")
+    gen.add_argument("--rows", type=_positive, required=True, help="number of users")
+    gen.add_argument("--format", choices=sorted(WRITERS),
+                     help="output format (default: guessed from --output, else csv)")
+    gen.add_argument("--output", "-o", help="output path (default: dataset_users.<format>)")
+    gen.add_argument("--seed", type=int, help="seed, for a reproducible dataset")
+    gen.add_argument("--chunk-size", type=_positive, help="rows generated and written at a time")
+    gen.add_argument("--workers", type=_positive, help="worker processes (default: 1)")
+    gen.add_argument("--locale", help="Faker locale of names and bios (default: en_US)")
+    gen.add_argument("--columns", help="comma separated columns to keep (uses the schema)")
+    gen.add_argument("--schema", help="YAML or JSON schema instead of the users one")
+    gen.add_argument("--hex-ids", action="store_true",
+                     help="ids as 32-char hex text instead of 16-byte binary values")
+    gen.add_argument("--unique-index", metavar="DIR",
+                     help="persistent on-disk index of the ids and emails")
+    gen.add_argument("--bloom-error", type=float, metavar="RATE",
+                     help="false positive rate of a Bloom filter in front of --unique-index")
+    gen.add_argument("--if-exists", choices=["fail", "replace", "append"],
+                     help="when the SQLite table already exists (default: fail)")
+    gen.add_argument("--background", action="store_true",
+                     help="write on a separate thread while generating")
+    gen.add_argument("--progress", action="store_true", help="show a progress bar")
+    gen.add_argument("--metrics", metavar="FILE", help="write per-stage metrics as JSON")
+    gen.add_argument("--trace-memory", action="store_true",
+                     help="add the allocations of every stage to --metrics (slower)")
+    gen.set_defaults(func=generate)
+
+    sch = commands.add_parser("schema", help="list the columns of a schema")
+    sch.add_argument("--schema", help="YAML or JSON schema (default: the users one)")
+    sch.set_defaults(func=schema)
+
+    app = commands.add_parser("append", help="add users to an existing CSV output")
+    app.add_argument("path", help="CSV file generated earlier")
+    app.add_argument("--rows", type=_positive, required=True, help="number of users to add")
+    app.add_argument("--seed", type=int, help="seed (default: continue the previous run)")
+    app.add_argument("--chunk-size", type=_positive, help="rows generated and written at a time")
+    app.add_argument("--progress", action="store_true", help="show a progress bar")
+    app.set_defaults(func=append, metrics=None, trace_memory=False)
+
+    return main_parser
+
+
+def main(argv=None):
+    main_parser = parser()
+    args = main_parser.parse_args(argv)
+    if args.func is generate:
+        _check_generate(main_parser, args)
+
+    try:
+        args.func(args)
+    except ValueError as exc:
+        # Refused outputs, such as an existing SQLite table
+        main_parser.error(str(exc))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
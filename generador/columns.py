@@ -0,0 +1,70 @@
+"""
+Vectorized generation of the weighted categorical columns of the dataset.
+"""
+import numpy as np
+import pandas as pd
+
+
+def codes_dtype(k):
+    """
+    Smallest integer type able to hold k category codes.
+    """
+    return np.int8 if k <= np.iinfo(np.int8).max else np.int32
+
+
+def weighted_codes(rng, k, n, weights=None):
+    """
+    Draws n indices in [0, k) with the given (unnormalized) weights.
+    """
+    if weights is None:
+        return rng.integers(0, k, size=n, dtype=codes_dtype(k))
+
+    weights = np.asarray(weights, dtype=np.float64)
+    if len(weights) != k:
+        raise ValueError("expected %d weights, got %d" % (k, len(weights)))
+    if (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError("weights must be non-negative and not all zero")
+
+    # Inverse transform sampling over the cumulative weights
+    cdf = np.cumsum(weights / weights.sum()).astype(np.float32)
+    cdf[-1] = 1.0
+    u = rng.random(n, dtype=np.float32)
+
+    return np.searchsorted(cdf, u, side="right").astype(codes_dtype(k), copy=False)
+
+
+class ColumnEngine:
+    """
+    Generates whole columns at once from a seeded numpy Generator.
+    """
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def categorical(self, categories, n, weights=None):
+        """
+        Weighted choice among categories, returned as a pd.Categorical.
+        """
+        codes = weighted_codes(self.rng, len(categories), n, weights)
+
+        return pd.Categorical.from_codes(codes, categories=list(categories))
+
+    def boolean(self, n, weights=None):
+        """
+        Weighted True/False column, weights given as (True, False).
+        """
+        p_true = 0.5
+        if weights is not None:
+            w_true, w_false = weights
+            p_true = w_true / (w_true + w_false)
+
+        return self.rng.random(n, dtype=np.float32) < p_true
+
+    def integer(self, values, n, weights=None, dtype=np.int8):
+        """
+        Weighted choice among integer values, returned as a numpy array.
+        """
+        values = np.asarray(values, dtype=dtype)
+        codes = weighted_codes(self.rng, len(values), n, weights)
+
+        return values[codes]
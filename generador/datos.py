@@ -0,0 +1,124 @@
+"""
+The column functions of the datos.py notebook, as an importable module.
+
+Same names and arguments as the notebook cells, so scripts and cron jobs
+can build the dataset without a Jupyter kernel. name_gen, getEducation and
+makeBio take a whole column and return one, or take a single value, as
+the original per-row cells did, and return a single value; emailGen
+allocates one address at a time, as its cell does. Every function draws
+from one shared ColumnEngine, reseeded with seed(). numpy, pandas and
+Faker are only imported by the first call that needs them.
+"""
+import datetime
+import random
+
+from generador.features import DOMAIN
+
+# Shared seeded engine, created on first use
+_ENGINE = []
+
+
+def seed(value=None):
+    """
+    Reseeds the engine of every function (and random, used by emailGen).
+    """
+    from generador.columns import ColumnEngine
+
+    random.seed(value)
+    _ENGINE[:] = [ColumnEngine(seed=value)]
+
+
+def _rng():
+    if not _ENGINE:
+        seed()
+
+    return _ENGINE[0].rng
+
+
+def _per_row(fn, values):
+    """
+    fn of a column, applied to a single value as a column of one.
+    """
+    import numpy as np
+
+    if np.ndim(values) == 0:
+        return fn(np.atleast_1d(values))[0]
+
+    return fn(values)
+
+
+def name_gen(gender, locale="en_US"):
+    """
+    Full names for a whole column of genders, or the name of one.
+    """
+    # The pools cached for the schema generators
+    from generador.schema import name_pools
+
+    pools = name_pools(locale)
+
+    return _per_row(lambda column: pools.full_names(_rng(), column), gender)
+
+
+def emailGen(name, allocator, domain=DOMAIN):
+    """
+    Email address based on the given name, numbered if already allocated.
+    """
+    name = name.lower().split(" ")
+    new_name = name[0] + random.choice([".", "_"]) + name[1]
+
+    return allocator.allocate(new_name, suffix=domain)
+
+
+def randomtimes(start, end, n, vectorized=True):
+    """
+    n random timestamps between two "%Y-%m-%d %H:%M:%S" times.
+
+    A datetime64[s] array, or a list of strings with vectorized=False.
+    """
+    from generador.timestamps import TIME_FORMAT, random_datetimes
+
+    if vectorized:
+        return random_datetimes(_rng(), start, end, n, frmt=TIME_FORMAT)
+
+    stime = datetime.datetime.strptime(start, TIME_FORMAT)
+    td = datetime.datetime.strptime(end, TIME_FORMAT) - stime
+
+    return [(random.random() * td + stime).strftime(TIME_FORMAT) for _ in range(n)]
+
+
+def random_dob(start, end, n, vectorized=True):
+    """
+    n random dates of birth between two "%Y-%m-%d" dates.
+
+    A datetime64[D] array, or a list of strings with vectorized=False.
+    """
+    from generador.timestamps import DATE_FORMAT, random_dates
+
+    if vectorized:
+        return random_dates(_rng(), start, end, n, frmt=DATE_FORMAT)
+
+    stime = datetime.datetime.strptime(start, DATE_FORMAT)
+    td = datetime.datetime.strptime(end, DATE_FORMAT) - stime
+
+    return [(random.random() * td + stime).strftime(DATE_FORMAT) for _ in range(n)]
+
+
+def getEducation(dob, now=None):
+    """
+    Education level of a whole column of dates of birth, or of one.
+    """
+    from generador.education import classify_education
+
+    return _per_row(lambda column: classify_education(column, now), dob)
+
+
+def makeBio(subscriber, locale="en_US", as_arrow=False):
+    """
+    Short or long bios for a whole column of subscription statuses, or
+    the bio of one.
+    """
+    from generador.schema import bio_engine
+
+    engine = bio_engine(locale)
+
+    return _per_row(lambda column: engine.bios(_rng(), column, as_arrow=as_arrow), subscriber)
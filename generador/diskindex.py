@@ -0,0 +1,403 @@
+"""
+On-disk uniqueness index of 64-bit fingerprints, for runs too large for RAM.
+
+Ids and emails are reduced to 64-bit fingerprints and kept in an
+open-addressing hash table stored in a memory-mapped .npy file, so a check
+is a couple of probes whatever the number of values, only the pages in use
+stay in memory and the index persists between runs. An optional Bloom
+filter, also memory-mapped and a fraction of the size, answers most
+batched lookups of values that were never seen without touching the table;
+single lookups, as the emails make, go straight to the table. Fingerprint
+matches are treated as in generador.ids.SortedFingerprints.
+"""
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+from generador.ids import id_fingerprints
+from generador.permutation import mix, mix_int
+
+# Marks an empty slot; a fingerprint of 0 is stored as 1
+EMPTY = np.uint64(0)
+
+# The table doubles before it is more than half full
+MAX_LOAD = 0.5
+
+DEFAULT_CAPACITY = 1 << 20
+
+# Slots reinserted at a time when the table grows
+_BLOCK = 1 << 20
+
+
+def fingerprint(value):
+    """
+    Stable 64-bit fingerprint of a string.
+    """
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def fingerprints(values):
+    """
+    Fingerprints of a column of strings, as a uint64 array.
+    """
+    return np.fromiter((fingerprint(v) for v in values), dtype=np.uint64, count=len(values))
+
+
+def _nonzero(fps):
+    fps = np.array(fps, dtype=np.uint64, ndmin=1)
+    fps[fps == EMPTY] = 1
+
+    return fps
+
+
+def find_or_insert(table, keys):
+    """
+    Slots of distinct, nonzero keys in an open-addressing table of uint64
+    (linear probing, a power of two in size), inserting the missing ones.
+
+    Returns the slots and a mask of the keys that were already there. The
+    caller keeps the table below MAX_LOAD.
+    """
+    mask = np.uint64(len(table) - 1)
+    result = np.empty(len(keys), dtype=np.int64)
+    found = np.zeros(len(keys), dtype=bool)
+
+    pending = np.arange(len(keys))
+    slots = keys & mask
+    while len(pending):
+        current = table[slots]
+        done = current == keys[pending]
+        found[pending[done]] = True
+
+        # Keys landing on empty slots all write there; the one that stays
+        # (any of them) owns the slot, the others look again
+        empty = np.flatnonzero(current == EMPTY)
+        table[slots[empty]] = keys[pending[empty]]
+        done[empty[table[slots[empty]] == keys[pending[empty]]]] = True
+
+        result[pending[done]] = slots[done]
+
+        # Losers look at the same slot again, now filled; the rest move on
+        move = ~done & (current != EMPTY)
+        slots[move] = (slots[move] + np.uint64(1)) & mask
+
+        pending = pending[~done]
+        slots = slots[~done]
+
+    return result, found
+
+
+def _open_array(path, dtype, size):
+    """
+    Memory-mapped .npy file, created filled with zeros if missing.
+    """
+    if os.path.exists(path):
+        return np.load(path, mmap_mode="r+")
+
+    return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(size,))
+
+
+class BloomFilter:
+    """
+    Memory-mapped Bloom filter of 64-bit fingerprints.
+    """
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, error_rate=0.01):
+        # Smallest power of two of bits giving error_rate at capacity
+        bits = -capacity * math.log(error_rate) / math.log(2) ** 2
+        bits = 1 << max(6, math.ceil(math.log2(bits)))
+
+        self.path = path
+        self.bits = _open_array(path, np.uint8, bits // 8)
+        self._mask = np.uint64(len(self.bits) * 8 - 1)
+        self.hashes = max(1, round(len(self.bits) * 8 / capacity * math.log(2)))
+
+        # The same bytes for single lookups, indexed with plain ints
+        self._bytes = memoryview(self.bits.view(np.ndarray))
+
+    def _positions(self, fps):
+        # Double hashing: h1 + i * h2, with h2 odd
+        h1 = np.asarray(fps, dtype=np.uint64)
+        h2 = mix(h1) | np.uint64(1)
+
+        return [(h1 + np.uint64(i) * h2) & self._mask for i in range(self.hashes)]
+
+    def contains(self, fps):
+        """
+        Mask of the fingerprints that may have been added.
+        """
+        found = np.ones(len(fps), dtype=bool)
+
+        for pos in self._positions(fps):
+            bits = self.bits[pos >> np.uint64(3)] >> (pos & np.uint64(7)).astype(np.uint8)
+            found &= bits & 1 == 1
+
+        return found
+
+    def add(self, fps):
+        for pos in self._positions(fps):
+            bits = (1 << (pos & np.uint64(7))).astype(np.uint8)
+            np.bitwise_or.at(self.bits, pos >> np.uint64(3), bits)
+
+    def add_one(self, fp):
+        # The positions of _positions, in plain ints
+        h2 = mix_int(fp) | 1
+        mask = int(self._mask)
+        data = self._bytes
+
+        for _ in range(self.hashes):
+            pos = fp & mask
+            data[pos >> 3] |= 1 << (pos & 7)
+            fp += h2
+
+    def flush(self):
+        self.bits.flush()
+
+
+class FingerprintSet:
+    """
+    Persistent set of 64-bit fingerprints in a memory-mapped hash table.
+
+    Lives in path (the table) and path + ".json" (its size); bloom_error
+    adds a Bloom filter front with that false positive rate in
+    path + ".bloom.npy". The metadata records the rate and the size of the
+    set when the filter was last in sync with the table; a filter that is
+    not (opened with another rate, or fingerprints added by a run without
+    it) is rebuilt from the table.
+    """
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, bloom_error=None):
+        self.path = path
+        self._meta_path = path + ".json"
+
+        meta = {"count": 0, "capacity": 1 << max(6, math.ceil(math.log2(capacity / MAX_LOAD)))}
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                meta.update(json.load(f))
+
+        self.count = meta["count"]
+        self.table = _open_array(path, np.uint64, meta["capacity"])
+        self._mask = np.uint64(len(self.table) - 1)
+
+        # Rate and set size of the filter file when it was last in sync
+        self._bloom_meta = {
+            "bloom_error": meta.get("bloom_error"),
+            "bloom_count": meta.get("bloom_count"),
+        }
+
+        self.bloom = None
+        self._bloom_error = bloom_error
+        if bloom_error is not None:
+            synced = self._bloom_meta == {"bloom_error": bloom_error, "bloom_count": self.count}
+            self._open_bloom(rebuild=not synced)
+
+    def __len__(self):
+        return self.count
+
+    def contains(self, fps):
+        """
+        Mask of the fingerprints in the set.
+        """
+        fps = _nonzero(fps)
+        found = np.zeros(len(fps), dtype=bool)
+
+        # Only the fingerprints the filter cannot rule out reach the table
+        pending = np.arange(len(fps))
+        if self.bloom is not None:
+            pending = pending[self.bloom.contains(fps)]
+
+        slots = fps[pending] & self._mask
+        while len(pending):
+            current = self.table[slots]
+            hit = current == fps[pending]
+            found[pending[hit]] = True
+
+            more = ~hit & (current != EMPTY)
+            pending = pending[more]
+            slots = (slots[more] + np.uint64(1)) & self._mask
+
+        return found
+
+    def __contains__(self, fp):
+        fp = int(fp) or 1
+
+        # A probe or two of the table cost less than the bits of the filter,
+        # which only pays off for the batches of contains()
+        mask = int(self._mask)
+        slot = fp & mask
+        while True:
+            current = int(self.table[slot])
+            if current == fp:
+                return True
+            if current == 0:
+                return False
+            slot = (slot + 1) & mask
+
+    def add_one(self, fp):
+        """
+        Adds one fingerprint. Returns whether it was already in the set.
+        """
+        if fp in self:
+            return True
+
+        if self.count + 1 > MAX_LOAD * len(self.table):
+            self._grow(self.count + 1)
+
+        fp = int(fp) or 1
+        mask = int(self._mask)
+        slot = fp & mask
+        while int(self.table[slot]) != 0:
+            slot = (slot + 1) & mask
+        self.table[slot] = fp
+
+        if self.bloom is not None:
+            self.bloom.add_one(fp)
+        self.count += 1
+
+        return False
+
+    def add(self, fps):
+        """
+        Adds fingerprints. Returns a mask of the ones already in the set,
+        including repeats within fps.
+        """
+        fps = _nonzero(fps)
+
+        if (self.count + len(fps)) > MAX_LOAD * len(self.table):
+            self._grow(self.count + len(fps))
+
+        taken = self._insert(fps)
+
+        if self.bloom is not None:
+            self.bloom.add(fps[~taken])
+        self.count += int((~taken).sum())
+
+        return taken
+
+    def _insert(self, fps):
+        taken = np.ones(len(fps), dtype=bool)
+
+        # Repeats within the batch are taken by their first occurrence
+        _, first = np.unique(fps, return_index=True)
+        _, found = find_or_insert(self.table, fps[first])
+        taken[first] = found
+
+        return taken
+
+    def _grow(self, count):
+        """
+        Rehashes into a table big enough for count fingerprints.
+        """
+        capacity = len(self.table)
+        while count > MAX_LOAD * capacity:
+            capacity *= 2
+
+        old = self.table
+        tmp = self.path + ".tmp.npy"
+        self.table = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.uint64, shape=(capacity,))
+        self._mask = np.uint64(capacity - 1)
+
+        for start in range(0, len(old), _BLOCK):
+            block = old[start:start + _BLOCK]
+            self._insert(block[block != EMPTY])
+
+        del old
+        self.table.flush()
+        os.replace(tmp, self.path)
+
+        if self.bloom is not None:
+            # A filter sized for the new capacity
+            self._open_bloom(rebuild=True)
+
+        self.flush()
+
+    def _open_bloom(self, rebuild=False):
+        """
+        Opens the Bloom filter, refilling it from the table if rebuild.
+        """
+        bloom_path = self.path + ".bloom.npy"
+        self.bloom = None
+        if rebuild and os.path.exists(bloom_path):
+            os.remove(bloom_path)
+
+        self.bloom = BloomFilter(bloom_path, int(MAX_LOAD * len(self.table)), self._bloom_error)
+
+        if rebuild:
+            for start in range(0, len(self.table), _BLOCK):
+                block = self.table[start:start + _BLOCK]
+                self.bloom.add(block[block != EMPTY])
+
+    def flush(self):
+        """
+        Writes the table and its size to disk.
+        """
+        self.table.flush()
+        if self.bloom is not None:
+            self.bloom.flush()
+            self._bloom_meta = {"bloom_error": self._bloom_error, "bloom_count": self.count}
+
+        # Without a filter, the one on disk (if any) keeps its old count and
+        # is rebuilt on the next open that uses it
+        meta = dict(self._bloom_meta, count=self.count, capacity=len(self.table))
+        with open(self._meta_path, "w") as f:
+            json.dump(meta, f)
+
+
+class StringFingerprints:
+    """
+    Set-like view of a FingerprintSet for strings, as used by UniqueAllocator.
+    """
+
+    def __init__(self, fps):
+        self.fps = fps
+
+    def __len__(self):
+        return len(self.fps)
+
+    def __contains__(self, value):
+        return fingerprint(value) in self.fps
+
+    def add(self, value):
+        self.fps.add_one(fingerprint(value))
+
+
+class DiskIdIndex:
+    """
+    IdIndex kept in a FingerprintSet.
+    """
+
+    def __init__(self, fps):
+        self.fps = fps
+
+    def __len__(self):
+        return len(self.fps)
+
+    def add(self, raw):
+        """
+        Records the ids of a chunk. Returns a mask of the rows that were
+        already taken, in this run, an earlier one or an earlier row.
+        """
+        return self.fps.add(id_fingerprints(raw))
+
+
+class DiskUniqueIndex:
+    """
+    Persistent id and email indexes of the users dataset, in one directory.
+    """
+
+    def __init__(self, directory, capacity=DEFAULT_CAPACITY, bloom_error=None):
+        os.makedirs(directory, exist_ok=True)
+
+        self.ids = DiskIdIndex(
+            FingerprintSet(os.path.join(directory, "ids.npy"), capacity, bloom_error)
+        )
+        self.emails = StringFingerprints(
+            FingerprintSet(os.path.join(directory, "emails.npy"), capacity, bloom_error)
+        )
+
+    def flush(self):
+        self.ids.fps.flush()
+        self.emails.fps.flush()
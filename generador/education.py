@@ -0,0 +1,41 @@
+"""
+Batched classification of the education level from the date of birth.
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+# Education levels, ordered by age
+EDUCATION_LEVELS = ["high school", "undergrad", "grad", "employed"]
+
+# First age of every level after the first one: <=18, <=22, <=25, older
+AGE_BINS = [19, 23, 26]
+
+
+def ages(dob, now):
+    """
+    Whole years between every date of birth and the reference date.
+    """
+    dob = pd.to_datetime(pd.Series(dob), format="%Y-%m-%d").to_numpy("datetime64[s]")
+    now = np.datetime64(now, "s")
+
+    # Whole days elapsed, as timedelta.days would give them
+    days = (now - dob).astype(np.int64) // 86400
+
+    return (days / 365.25).astype(np.int64)
+
+
+def classify_education(dob, now=None):
+    """
+    Assigns an education level to a whole column of dates of birth.
+
+    Every row is compared against the same reference date, taken once
+    when now is not given.
+    """
+    if now is None:
+        now = datetime.datetime.now()
+
+    codes = np.digitize(ages(dob, now), AGE_BINS).astype(np.int8)
+
+    return pd.Categorical.from_codes(codes, categories=EDUCATION_LEVELS)
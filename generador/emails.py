@@ -0,0 +1,116 @@
+"""
+Batched generation of unique email addresses derived from names.
+"""
+import numpy as np
+import pandas as pd
+
+from generador.features import DOMAIN
+
+# Characters inserted between first and last name
+SEPARATORS = [".", "_"]
+
+# Suffix code of an address used as is, without a number
+NO_SUFFIX = -1
+
+
+def separator_codes(rng, n):
+    """
+    Index in SEPARATORS of the separator of n addresses.
+    """
+    return rng.integers(0, len(SEPARATORS), size=n).astype(np.int8)
+
+
+def join_bases(names, codes):
+    """
+    Local parts of the form first<sep>last, given the separator codes.
+
+    Built with vectorized string operations, as a Series on the index of
+    names when it has one.
+    """
+    lower = pd.Series(names).str.lower()
+    codes = np.asarray(codes)
+
+    bases = lower.str.replace(" ", SEPARATORS[0], n=1, regex=False)
+    for code, sep in enumerate(SEPARATORS[1:], 1):
+        bases = bases.where(codes != code, lower.str.replace(" ", sep, n=1, regex=False))
+
+    # Names of more than two words keep the first two, as split(" ") did
+    longer = bases.str.contains(" ", regex=False).to_numpy(dtype=bool)
+    if longer.any():
+        bases[longer] = bases[longer].str.split(" ").str[0]
+
+    return bases
+
+
+def base_fingerprints(bases):
+    """
+    64-bit hashes of a column of local parts, as a uint64 array.
+    """
+    return pd.util.hash_pandas_object(pd.Series(bases), index=False).to_numpy(np.uint64)
+
+
+def email_bases(rng, names):
+    """
+    Local parts of the form first<sep>last for a column of names.
+    """
+    return join_bases(names, separator_codes(rng, len(names)))
+
+
+def allocate_emails(bases, allocator, domain=DOMAIN):
+    """
+    Turns local parts into unique addresses, adding a number when taken.
+
+    The allocator keeps addresses unique across every call that shares it.
+    """
+    return [allocator.allocate(base, suffix=domain) for base in bases]
+
+
+def allocate_suffixes(bases, allocator, domain=DOMAIN):
+    """
+    Allocates the addresses of allocate_emails, but returns only the number
+    added to every one (NO_SUFFIX when none), as an int32 array.
+    """
+    suffixes = np.full(len(bases), NO_SUFFIX, dtype=np.int32)
+    end = -len(domain) if domain else None
+
+    for i, base in enumerate(bases):
+        number = allocator.allocate(base, suffix=domain)[len(base):end]
+        if number:
+            suffixes[i] = int(number)
+
+    return suffixes
+
+
+def add_suffixes(bases, suffixes, domain=DOMAIN):
+    """
+    Addresses of local parts and their allocated numbers (NO_SUFFIX for
+    none), as a Series on the index of bases.
+    """
+    bases = pd.Series(bases)
+    suffixes = np.asarray(suffixes)
+
+    top = int(suffixes.max()) if len(suffixes) else NO_SUFFIX
+    if top < len(suffixes):
+        # Text of every number up to the largest, "" first for NO_SUFFIX
+        text = np.array([""] + [str(i) for i in range(top + 1)], dtype=object)
+        numbers = text[suffixes + 1]
+    else:
+        numbers = np.where(suffixes == NO_SUFFIX, "", suffixes.astype(str)).astype(object)
+    numbers = pd.Series(numbers, index=bases.index, dtype=bases.dtype)
+
+    return bases + numbers + domain
+
+
+def render_emails(names, codes, suffixes, domain=DOMAIN):
+    """
+    Addresses of allocate_emails rebuilt from the names, the separator codes
+    and the allocated numbers.
+    """
+    return add_suffixes(join_bases(names, codes), suffixes, domain)
+
+
+def make_emails(rng, names, allocator, domain=DOMAIN):
+    """
+    Unique emails of the form first<sep>last[number]@domain for a column of names.
+    """
+    return allocate_emails(email_bases(rng, names), allocator, domain)
@@ -0,0 +1,35 @@
+"""
+Columns of the users dataset and the parameters of their distributions.
+
+Only the standard library is used here, so schema listing can build the
+users schema from these without loading numpy or pandas.
+"""
+
+# The 10 features of the dataset, in order
+FEATURES = [
+    "id",
+    "gender",
+    "subscriber",
+    "name",
+    "email",
+    "last_login",
+    "dob",
+    "education",
+    "bio",
+    "rating",
+]
+
+GENDERS = ["male", "female", "na"]
+GENDER_WEIGHTS = (47, 47, 6)
+
+RATINGS = [1, 2, 3, 4, 5]
+RATING_WEIGHTS = (30, 10, 10, 10, 30)
+
+LOGIN_START = "2021-08-01 00:00:00"
+LOGIN_END = "2021-08-24 00:00:00"
+
+DOB_START = "1980-01-01"
+DOB_END = "2006-01-01"
+
+# Fake domain name to use
+DOMAIN = "@fakemail.com"
@@ -0,0 +1,232 @@
+"""
+Compact UUID id columns: 16 bytes per row in one contiguous buffer.
+
+Ids are generated as an (n, 16) uint8 array, checked for uniqueness on
+64-bit fingerprints of the raw values and stored either as an Arrow
+fixed_size_binary(16) column or, when asked for, as the 32-character hex
+text of uuid.hex. Writers of text formats render the hex form at export
+time.
+"""
+import importlib.util
+import os
+
+import numpy as np
+
+# Bytes per id
+ID_SIZE = 16
+
+
+def random_uuid_bytes(rng, n):
+    """
+    n random version 4 UUIDs as an (n, 16) uint8 array.
+
+    Uses the numpy Generator when given, os.urandom otherwise.
+    """
+    if rng is None:
+        raw = np.frombuffer(os.urandom(ID_SIZE * n), dtype=np.uint8).reshape(n, ID_SIZE).copy()
+    else:
+        raw = rng.integers(0, 256, size=(n, ID_SIZE), dtype=np.uint8)
+
+    return set_uuid4_bits(raw)
+
+
+def set_uuid4_bits(raw):
+    """
+    Sets the version and variant bits of (n, 16) random bytes in place, as
+    uuid.uuid4() does. Returns raw.
+    """
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+
+    return raw
+
+
+def uuid_hex(raw):
+    """
+    Renders (n, 16) UUID bytes as 32-character hex strings, like uuid.hex.
+    """
+    text = np.ascontiguousarray(raw).tobytes().hex().encode("ascii")
+
+    return np.frombuffer(text, dtype="S32").astype("U32")
+
+
+def count_duplicates(raw):
+    """
+    Number of rows repeating an earlier row, compared as 128-bit values.
+    """
+    # Two big-endian 64-bit halves sort like the raw bytes
+    halves = np.ascontiguousarray(raw).view(">u8").reshape(-1, 2)
+    order = np.lexsort((halves[:, 1], halves[:, 0]))
+    ordered = halves[order]
+
+    same = (ordered[1:] == ordered[:-1]).all(axis=1)
+
+    return int(same.sum())
+
+
+def id_fingerprints(raw):
+    """
+    Fingerprints of (n, 16) raw ids: their first 8 bytes.
+    """
+    return np.ascontiguousarray(raw[:, :8]).view("<u8").ravel()
+
+
+class SortedFingerprints:
+    """
+    Set of 64-bit fingerprints, such as those of ids or emails.
+
+    Kept as sorted uint64 runs, 8 bytes per value: every batch adds a run
+    and runs of similar size are merged, as in a binary counter, so a batch
+    costs a few searchsorted passes. A fingerprint match is treated as
+    taken, so a (rare) false match only costs a redraw or an email suffix,
+    never a duplicate; the same goes for every fingerprint index of the
+    package (see generador.diskindex and generador.append).
+    """
+
+    def __init__(self, values=None):
+        # Sorted runs, each at least twice as long as the next one
+        self._runs = []
+        if values is not None and len(values):
+            self._runs.append(np.sort(np.asarray(values, dtype=np.uint64)))
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    @property
+    def values(self):
+        """
+        Every fingerprint, as one sorted uint64 array.
+        """
+        if len(self._runs) == 1:
+            return self._runs[0]
+
+        return np.sort(np.concatenate(self._runs or [np.zeros(0, dtype=np.uint64)]))
+
+    def contains(self, fps):
+        """
+        Mask of the fingerprints already in the set.
+        """
+        fps = np.asarray(fps, dtype=np.uint64)
+        found = np.zeros(len(fps), dtype=bool)
+
+        for run in self._runs:
+            pos = np.searchsorted(run, fps)
+            pos[pos == len(run)] = 0
+            found |= run[pos] == fps
+
+        return found
+
+    def __contains__(self, fp):
+        return bool(self.contains([fp])[0])
+
+    def add_fingerprints(self, fps):
+        """
+        Adds fingerprints. Returns a mask of the ones already in the set,
+        including repeats within fps.
+        """
+        fps = np.asarray(fps, dtype=np.uint64)
+
+        # Checking in sorted order; repeats within the batch are taken by
+        # their first occurrence, which the stable sort puts first
+        order = np.argsort(fps, kind="stable")
+        ordered = fps[order]
+        taken = self.contains(ordered)
+        taken[1:] |= ordered[1:] == ordered[:-1]
+
+        if not taken.all():
+            self._runs.append(ordered[~taken])
+        while len(self._runs) > 1 and 2 * len(self._runs[-1]) > len(self._runs[-2]):
+            last = self._runs.pop()
+            self._runs[-1] = np.sort(np.concatenate((self._runs[-1], last)), kind="stable")
+
+        mask = np.empty(len(fps), dtype=bool)
+        mask[order] = taken
+
+        return mask
+
+
+class IdIndex(SortedFingerprints):
+    """
+    Fingerprints of the ids seen so far, shared by all the chunks of a run.
+    """
+
+    def add(self, raw):
+        """
+        Records the ids of a chunk. Returns a mask of the rows that were
+        already taken, by an earlier chunk or an earlier row.
+        """
+        return self.add_fingerprints(id_fingerprints(raw))
+
+
+def unique_ids(raw, index, rng=None):
+    """
+    Records raw ids in the index, drawing new ones for rows already taken.
+    """
+    taken = index.add(raw)
+
+    while taken.any():
+        rows = np.flatnonzero(taken)
+        raw[rows] = random_uuid_bytes(rng, len(rows))
+        taken[rows] = index.add(raw[rows])
+
+    return raw
+
+
+def has_arrow():
+    """
+    Whether pyarrow is installed, without importing it.
+    """
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def id_column(raw, binary=None):
+    """
+    Column for raw ids: Arrow fixed_size_binary(16) (needs pyarrow), or hex text.
+
+    binary=None picks the binary column when pyarrow is installed.
+    """
+    if binary is None:
+        binary = has_arrow()
+    if not binary:
+        return uuid_hex(raw)
+
+    import pandas as pd
+    import pyarrow as pa
+
+    raw = np.ascontiguousarray(raw)
+    array = pa.FixedSizeBinaryArray.from_buffers(
+        pa.binary(ID_SIZE), len(raw), [None, pa.py_buffer(raw)]
+    )
+
+    return pd.arrays.ArrowExtensionArray(pa.chunked_array([array]))
+
+
+def is_binary_id(values):
+    """
+    Whether a column holds Arrow fixed_size_binary(16) ids.
+    """
+    pyarrow_dtype = getattr(getattr(values, "dtype", None), "pyarrow_dtype", None)
+
+    return pyarrow_dtype is not None and str(pyarrow_dtype) == "fixed_size_binary[16]"
+
+
+def id_bytes(values):
+    """
+    (n, 16) uint8 array of an id column, binary or hex.
+    """
+    if is_binary_id(values):
+        import pyarrow as pa
+
+        array = pa.array(values.array if hasattr(values, "array") else values)
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+
+        data = np.frombuffer(array.buffers()[1], dtype=np.uint8)
+        start = array.offset * ID_SIZE
+        data = data[start:start + len(array) * ID_SIZE]
+
+        return data.reshape(-1, ID_SIZE).copy()
+
+    text = "".join(np.asarray(values, dtype="U32").tolist())
+
+    return np.frombuffer(bytes.fromhex(text), dtype=np.uint8).reshape(-1, ID_SIZE).copy()
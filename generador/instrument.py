@@ -0,0 +1,166 @@
+"""
+Per-stage instrumentation of dataset builds.
+
+Metrics times every stage (one per column, plus the export), counts its
+rows, optionally traces its allocations with tracemalloc, and can draw a
+live progress bar on stderr. report() returns everything as a dict and
+write_json() stores it as a JSON metrics report.
+
+Stages may also be timed on other threads, as the export of a background
+writer is. tracemalloc counts the allocations of the whole process, so
+those stages are timed only, and the progress bar is drawn by the thread
+that created the Metrics.
+"""
+import contextlib
+import json
+import sys
+import threading
+import time
+import tracemalloc
+
+
+class Metrics:
+    """
+    Collects wall time, rows and allocations of every stage of a build.
+    """
+
+    def __init__(self, total_rows=None, progress=False, trace_memory=False, stream=None):
+        self.total_rows = total_rows
+        self.progress = progress
+        self.trace_memory = trace_memory
+        self.stream = stream or sys.stderr
+
+        # {stage: {"seconds", "rows", "calls", "allocated_bytes", "peak_bytes"}}
+        self.stages = {}
+
+        # Counters reported as they are, such as email collisions
+        self.counters = {}
+
+        self.rows_done = 0
+        self._current = None
+        self._thread = threading.get_ident()
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._last_draw = 0.0
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name, rows):
+        """
+        Measures the block as one call of the given stage.
+        """
+        own = threading.get_ident() == self._thread
+        trace = self.trace_memory and own
+
+        if own:
+            self._current = name
+        if trace:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                stats = self.stages.setdefault(
+                    name, {"seconds": 0.0, "rows": 0, "calls": 0}
+                )
+                stats["seconds"] += elapsed
+                stats["rows"] += rows
+                stats["calls"] += 1
+
+                if trace:
+                    after, peak = tracemalloc.get_traced_memory()
+                    stats["allocated_bytes"] = stats.get("allocated_bytes", 0) + after - before
+                    stats["peak_bytes"] = max(stats.get("peak_bytes", 0), peak - before)
+
+            if own:
+                self._draw()
+
+    def advance(self, rows):
+        """
+        Marks rows as fully built and written.
+        """
+        with self._lock:
+            self.rows_done += rows
+
+        if threading.get_ident() == self._thread:
+            self._draw(force=True)
+
+    def _draw(self, force=False):
+        if not self.progress:
+            return
+
+        now = time.perf_counter()
+        if not force and now - self._last_draw < 0.2:
+            return
+        self._last_draw = now
+
+        elapsed = now - self._started
+        rate = self.rows_done / elapsed if elapsed else 0.0
+
+        if self.total_rows:
+            done = self.rows_done / self.total_rows
+            bar = "#" * int(30 * done)
+            eta = "%.0fs" % ((self.total_rows - self.rows_done) / rate) if rate else "?"
+            line = "[%-30s] %5.1f%% %d/%d rows %.0f rows/s eta %s [%s]" % (
+                bar, 100 * done, self.rows_done, self.total_rows, rate, eta, self._current
+            )
+        else:
+            line = "%d rows %.0f rows/s [%s]" % (self.rows_done, rate, self._current)
+
+        # Padding over whatever a longer previous line left behind
+        self.stream.write("\r" + line.ljust(100))
+        if self.total_rows and self.rows_done >= self.total_rows:
+            self.stream.write("\n")
+        self.stream.flush()
+
+    def report(self):
+        """
+        Metrics of the whole build, with rows/s per stage.
+        """
+        with self._lock:
+            stages = {name: dict(stats) for name, stats in self.stages.items()}
+
+        for stats in stages.values():
+            stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else None
+
+        elapsed = time.perf_counter() - self._started
+
+        return {
+            "rows": self.rows_done,
+            "seconds": elapsed,
+            "rows_per_sec": self.rows_done / elapsed if elapsed else None,
+            "stages": stages,
+            "counters": self.counters,
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+class _NoMetrics:
+    """
+    Stand-in used when a build is not instrumented.
+    """
+
+    @property
+    def counters(self):
+        # A new dict on every access, so what callers store is dropped
+        return {}
+
+    @contextlib.contextmanager
+    def stage(self, name, rows):
+        yield
+
+    def advance(self, rows):
+        pass
+
+
+NO_METRICS = _NoMetrics()
@@ -0,0 +1,176 @@
+"""
+Correlated columns sampled from conditional probability tables.
+
+A Conditional declares P(column | parent) once, as the weights of every
+value for each parent value (or each bucket of a numeric parent). Sampling
+is vectorized: the parent column is turned into group codes and every
+group of rows sharing the same weights is drawn in one inverse-CDF pass,
+so a new correlation costs one pass per distinct row of its table, never
+a Python loop per row. A JointModel gathers the tables of a dataset.
+"""
+import numpy as np
+import pandas as pd
+
+from generador.columns import codes_dtype, weighted_codes
+
+
+class Conditional:
+    """
+    P(column | parent) as a table of weights.
+
+    weights maps every parent value to the weights of values or, when bins
+    are given, lists the weights of the len(bins) + 1 buckets of a numeric
+    parent (as np.digitize numbers them). Integer values come out as a
+    numpy array of dtype (when given), text values as a pd.Categorical.
+    """
+
+    def __init__(self, parent, values, weights, bins=None, dtype=None):
+        self.parent = parent
+        self.values = list(values)
+        self.bins = None if bins is None else np.asarray(bins)
+        self.dtype = dtype
+
+        if bins is None:
+            self.keys = list(weights)
+            rows = [weights[key] for key in self.keys]
+        else:
+            self.keys = None
+            rows = list(weights)
+            if len(rows) != len(bins) + 1:
+                raise ValueError(
+                    "expected %d rows of weights, got %d" % (len(bins) + 1, len(rows))
+                )
+
+        self.table = np.asarray(rows, dtype=np.float64)
+        if self.table.ndim != 2 or self.table.shape[1] != len(self.values):
+            raise ValueError("every row needs %d weights" % len(self.values))
+        if (self.table < 0).any() or (self.table.sum(axis=1) <= 0).any():
+            raise ValueError("weights must be non-negative and not all zero")
+
+        # Parent groups with the same weights are drawn in a single pass
+        self._groups = []
+        for code, row in enumerate(self.table):
+            for group_row, members in self._groups:
+                if np.array_equal(group_row, row):
+                    members.append(code)
+                    break
+            else:
+                self._groups.append((row, [code]))
+
+        # A table with a single possible value per parent needs no draws
+        self._lookup = None
+        if ((self.table > 0).sum(axis=1) == 1).all():
+            self._lookup = self.table.argmax(axis=1).astype(codes_dtype(len(self.values)))
+
+    @property
+    def deterministic(self):
+        """
+        Whether every parent value has a single possible value.
+        """
+        return self._lookup is not None
+
+    @classmethod
+    def from_choices(cls, parent, choices, dtype=None):
+        """
+        Table from {parent value: (values, weights)}, each parent with its
+        own values, as BIO_LENGTHS declares them.
+        """
+        values = sorted({value for vals, _ in choices.values() for value in vals})
+        weights = {}
+        for key, (vals, w) in choices.items():
+            row = np.zeros(len(values))
+            row[[values.index(value) for value in vals]] = w
+            weights[key] = row
+
+        return cls(parent, values, weights, dtype=dtype)
+
+    def parent_codes(self, parent):
+        """
+        Row of the table of every parent value.
+        """
+        if self.bins is not None:
+            return np.digitize(np.asarray(parent), self.bins)
+
+        codes = pd.Index(self.keys).get_indexer(np.asarray(parent))
+        if (codes < 0).any():
+            raise ValueError("%s values without weights: %s" % (
+                self.parent, sorted(set(np.asarray(parent)[codes < 0].tolist()))
+            ))
+
+        return codes
+
+    def sample_codes(self, rng, parent):
+        """
+        Value codes for a whole parent column, drawn group by group.
+        """
+        parent_codes = self.parent_codes(parent)
+        if self._lookup is not None:
+            return self._lookup[parent_codes]
+
+        k = len(self.values)
+        codes = np.empty(len(parent_codes), dtype=codes_dtype(k))
+
+        for weights, members in self._groups:
+            if len(self._groups) == 1:
+                mask = slice(None)
+                count = len(parent_codes)
+            else:
+                mask = np.isin(parent_codes, members)
+                count = int(mask.sum())
+            codes[mask] = weighted_codes(rng, k, count, weights)
+
+        return codes
+
+    def sample(self, rng, parent):
+        """
+        Values for a whole parent column.
+        """
+        codes = self.sample_codes(rng, parent)
+
+        if self.dtype is not None:
+            return np.asarray(self.values, dtype=self.dtype)[codes]
+        if all(isinstance(value, str) for value in self.values):
+            return pd.Categorical.from_codes(codes, categories=self.values)
+
+        return np.asarray(self.values)[codes]
+
+
+class JointModel:
+    """
+    The conditional tables of a dataset, by column name.
+
+    Parents are read from the chunk being built, or computed by a derived
+    function (chunk, now) -> column, such as ages from dates of birth.
+    """
+
+    def __init__(self, tables, derived=None):
+        self.tables = dict(tables)
+        self.derived = dict(derived or {})
+
+    def __contains__(self, name):
+        return name in self.tables
+
+    def __getitem__(self, name):
+        return self.tables[name]
+
+    def replace(self, **tables):
+        """
+        Copy of the model with some tables added or replaced.
+        """
+        return JointModel(dict(self.tables, **tables), self.derived)
+
+    def parent(self, name, df, now=None):
+        """
+        Parent column of a table, taken from df or derived from it.
+        """
+        parent = self.tables[name].parent
+        if parent in self.derived:
+            return self.derived[parent](df, now)
+
+        return np.asarray(df[parent])
+
+    def sample(self, name, rng, df, now=None):
+        """
+        Values of one conditional column for the rows of df.
+        """
+        return self.tables[name].sample(rng, self.parent(name, df, now))
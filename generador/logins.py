@@ -0,0 +1,155 @@
+"""
+Login events of the users, as a logins(user_id, ts) fact table.
+
+Every user gets a number of logins drawn from a Poisson law whose mean
+depends on the subscription, the earlier ones uniform between LOGIN_START
+and the user's last_login and sorted, the final one at last_login itself.
+Everything is drawn per block of events with numpy, and blocks never hold
+more than max_events rows, so the size of the table only costs time.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from generador.ids import id_bytes, id_column, is_binary_id
+from generador.instrument import NO_METRICS
+from generador.pipeline import DEFAULT_CHUNK_SIZE, LOGIN_START, UsersGenerator
+from generador.seeding import LOGINS_KEY, derived_seed
+from generador.timestamps import TIME_FORMAT, to_datetime64
+from generador.writers import EXTENSIONS, open_writer, write_chunks
+
+# Mean number of logins before the last one, for subscribers and the rest
+LOGIN_RATES = {True: 20.0, False: 5.0}
+
+# Rows per block of events
+DEFAULT_MAX_EVENTS = 2_000_000
+
+# SqliteWriter options of the logins table: no key, events are not unique
+SQLITE_OPTIONS = {"table": "logins", "primary_key": None, "unique": ()}
+
+
+class LoginEvents:
+    """
+    Draws the login events of chunks of users.
+    """
+
+    def __init__(self, seed=None, start=LOGIN_START, rates=LOGIN_RATES,
+                 max_events=DEFAULT_MAX_EVENTS):
+        self.rng = np.random.default_rng(seed)
+        self.start = to_datetime64(start, TIME_FORMAT, "s")
+        self.rates = rates
+        self.max_events = max_events
+
+        # Number of events handed out so far, the index of the next one
+        self.events = 0
+
+    def counts(self, subscriber, last_login):
+        """
+        Logins of every user, the last one included (at least 1).
+        """
+        subscriber = np.asarray(subscriber, dtype=bool)
+        means = np.where(subscriber, self.rates[True], self.rates[False])
+        counts = self.rng.poisson(means) + 1
+
+        # Nothing can come before a last login at the very start
+        counts[np.asarray(last_login, dtype="datetime64[s]") <= self.start] = 1
+
+        return counts
+
+    def timestamps(self, counts, last_login):
+        """
+        Sorted timestamps of the users' events, user after user.
+        """
+        n = len(counts)
+        total = int(counts.sum())
+        span = (np.asarray(last_login, dtype="datetime64[s]") - self.start).astype(np.int64)
+
+        user = np.repeat(np.arange(n, dtype=np.int64), counts)
+        first = np.cumsum(counts) - counts
+        last = np.zeros(total, dtype=bool)
+        last[first + counts - 1] = True
+
+        # The last event at last_login, the rest uniform before it
+        offsets = np.repeat(span, counts)
+        earlier = ~last
+        offsets[earlier] = self.rng.integers(0, offsets[earlier])
+
+        # Sorting by (user, offset) at once: users stay in order and every
+        # last login ends up last, as nothing is drawn after it
+        width = int(span.max()) + 1 if n else 1
+        keys = np.sort(user * width + offsets)
+
+        return self.start + (keys - user * width).astype("timedelta64[s]")
+
+    def frames(self, users):
+        """
+        Yields the logins of a chunk of users in blocks of at most
+        max_events rows (or a single user's logins, if more).
+        """
+        subscriber = users["subscriber"].to_numpy()
+        last_login = users["last_login"].to_numpy("datetime64[s]")
+        raw = id_bytes(users["id"])
+        binary = is_binary_id(users["id"])
+
+        counts = self.counts(subscriber, last_login)
+        ends = np.cumsum(counts)
+
+        start = 0
+        while start < len(counts):
+            # As many whole users as fit in a block
+            done = ends[start - 1] if start else 0
+            stop = max(start + 1, int(np.searchsorted(ends, done + self.max_events, side="right")))
+
+            block = counts[start:stop]
+            ts = self.timestamps(block, last_login[start:stop])
+
+            frame = pd.DataFrame(
+                {
+                    "user_id": id_column(np.repeat(raw[start:stop], block, axis=0), binary),
+                    "ts": ts,
+                },
+                index=pd.RangeIndex(self.events, self.events + len(ts)),
+            )
+            self.events += len(ts)
+            start = stop
+
+            yield frame
+
+
+def generate_logins(users_path, logins_path, num_users, format=None, logins_format=None,
+                    chunk_size=DEFAULT_CHUNK_SIZE, seed=None, rates=LOGIN_RATES,
+                    max_events=DEFAULT_MAX_EVENTS, writer_options=None, logins_options=None,
+                    metrics=None, **kwargs):
+    """
+    Generates num_users users and their logins into two files, chunk by
+    chunk. Returns the number of users and of login events.
+
+    The two outputs must be different files; options of each writer go in
+    writer_options and logins_options.
+    """
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    metrics = metrics or NO_METRICS
+
+    logins_options = dict(logins_options or {})
+    if (logins_format or EXTENSIONS.get(os.path.splitext(logins_path)[1].lower())) == "sqlite":
+        logins_options = dict(SQLITE_OPTIONS, **logins_options)
+
+    generator = UsersGenerator(seed=seed, metrics=metrics, **kwargs)
+    events = LoginEvents(derived_seed(seed, LOGINS_KEY), rates=rates, max_events=max_events)
+
+    with open_writer(logins_path, logins_format, **logins_options) as logins:
+
+        def chunks():
+            for chunk in generator.chunks(num_users, chunk_size):
+                with metrics.stage("logins", len(chunk)):
+                    for frame in events.frames(chunk):
+                        logins.write(frame)
+                yield chunk
+
+        rows = write_chunks(
+            chunks(), users_path, format, metrics=metrics, **(writer_options or {})
+        )
+
+    return rows, events.events
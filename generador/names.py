@@ -0,0 +1,230 @@
+"""
+Name pools built once from Faker's vocabularies and sampled vectorially.
+"""
+import importlib.metadata
+import os
+
+import numpy as np
+
+from generador.permutation import FeistelPermutation
+
+# Where the extracted pools are kept between runs
+CACHE_DIR = os.environ.get(
+    "GENERADOR_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "generador")
+)
+
+# Pool used by every gender that has no pool of its own
+ANY = "any"
+
+# Faker vocabulary behind every pool
+_SOURCES = {
+    "male": "first_names_male",
+    "female": "first_names_female",
+    ANY: "first_names",
+    "last": "last_names",
+}
+
+
+def _person_provider(locale):
+    """
+    Faker's person provider for the given locale.
+    """
+    from faker import Faker
+
+    fake = Faker(locale)
+    for provider in fake.providers:
+        if type(provider).__module__.startswith("faker.providers.person"):
+            return provider
+
+    raise ValueError("no person provider for locale %r" % locale)
+
+
+def _words_and_weights(vocabulary):
+    """
+    Splits a Faker vocabulary (weighted dict or plain sequence) into arrays.
+    """
+    words = list(vocabulary)
+    if hasattr(vocabulary, "values"):
+        weights = np.array(list(vocabulary.values()), dtype=np.float64)
+    else:
+        weights = np.ones(len(words))
+
+    return np.array(words), weights / weights.sum()
+
+
+def _cache_path(locale, cache_dir):
+    # The installed version, read without importing Faker
+    version = importlib.metadata.version("Faker")
+
+    return os.path.join(cache_dir, "names-%s-faker%s.npz" % (locale, version))
+
+
+class NamePools:
+    """
+    First-name pools per gender plus a last-name pool for one locale.
+    """
+
+    def __init__(self, pools, locale):
+        # {pool: (words, probabilities)}
+        self.pools = pools
+        self.locale = locale
+
+    @classmethod
+    def from_faker(cls, locale="en_US"):
+        """
+        Extracts the pools from Faker's person provider.
+        """
+        provider = _person_provider(locale)
+        pools = {
+            key: _words_and_weights(getattr(provider, attr))
+            for key, attr in _SOURCES.items()
+        }
+
+        return cls(pools, locale)
+
+    @classmethod
+    def load(cls, locale="en_US", cache_dir=CACHE_DIR):
+        """
+        Loads the pools from the disk cache, building them on the first call.
+        """
+        path = _cache_path(locale, cache_dir)
+
+        if os.path.exists(path):
+            with np.load(path, allow_pickle=False) as data:
+                pools = {key: (data[key], data[key + "_p"]) for key in _SOURCES}
+            return cls(pools, locale)
+
+        pools = cls.from_faker(locale)
+        pools.save(path)
+
+        return pools
+
+    def save(self, path):
+        """
+        Writes the pools as a compressed numpy archive.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        arrays = {}
+        for key, (words, probs) in self.pools.items():
+            arrays[key] = words
+            arrays[key + "_p"] = probs
+
+        # Writing next to the target first so readers never see half a file
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def pick(self, pool, uniforms):
+        """
+        Words of one pool at the given uniforms in [0, 1), following
+        Faker's weights (the inverse CDF rng.choice uses).
+        """
+        words, probs = self.pools[pool]
+        cdf = probs.cumsum()
+        cdf /= cdf[-1]
+
+        return words[cdf.searchsorted(uniforms, side="right")]
+
+    def draw(self, rng, pool, n):
+        """
+        Samples n words from one pool following Faker's weights.
+        """
+        return self.pick(pool, rng.random(n))
+
+    def first_names(self, rng, gender, uniforms=None):
+        """
+        First names matching every value of the gender column.
+
+        Drawn from rng, or picked at the given uniforms (one per row).
+        """
+        gender = np.asarray(gender, dtype=object)
+        n = len(gender)
+
+        width = max(words.dtype.itemsize // 4 for words, _ in self.pools.values())
+        names = np.empty(n, dtype="U%d" % width)
+
+        def fill(pool, mask):
+            u = rng.random(int(mask.sum())) if uniforms is None else uniforms[mask]
+            names[mask] = self.pick(pool, u)
+
+        # Genders without a pool of their own fall back to the mixed pool
+        rest = np.ones(n, dtype=bool)
+        for pool in ("male", "female"):
+            mask = gender == pool
+            fill(pool, mask)
+            rest &= ~mask
+        fill(ANY, rest)
+
+        return names
+
+    def full_names(self, rng, gender, surnames=1):
+        """
+        "First Last" names for every value of the gender column.
+
+        Locales such as es_ES use two last names, set surnames=2 for those.
+        """
+        names = self.first_names(rng, gender)
+
+        for _ in range(surnames):
+            names = np.char.add(names, " ")
+            names = np.char.add(names, self.draw(rng, "last", len(names)))
+
+        return names
+
+
+class UniqueNameSampler:
+    """
+    Draws full names without replacement from the first x last name space.
+
+    Every name is a distinct (first, last, ..., last) combination: draw k
+    maps to combination perm(k) of a keyed permutation, so successive
+    draws, such as the lists of several roles, never overlap and each name
+    costs the same no matter how many were drawn before. Faker's weights
+    are not used, every combination is equally likely.
+    """
+
+    def __init__(self, locale="es_ES", seed=None, surnames=2, cache_dir=CACHE_DIR):
+        pools = NamePools.load(locale, cache_dir)
+
+        self.first = np.unique(pools.pools[ANY][0])
+        self.last = np.unique(pools.pools["last"][0])
+        self.surnames = surnames
+
+        self.size = len(self.first) * len(self.last) ** surnames
+        self._permutation = FeistelPermutation(self.size, seed)
+
+        # Next draw number
+        self.drawn = 0
+
+    def sample(self, n):
+        """
+        n names never returned by a previous call.
+        """
+        if self.drawn + n > self.size:
+            raise ValueError(
+                "only %d unique names left in this locale" % (self.size - self.drawn)
+            )
+
+        combos = self._permutation(np.arange(self.drawn, self.drawn + n, dtype=np.uint64))
+        self.drawn += n
+
+        # Decoding every combination as mixed-radix digits
+        combos = combos.astype(np.int64)
+        n_last = len(self.last)
+        parts = []
+        for _ in range(self.surnames):
+            combos, digit = np.divmod(combos, n_last)
+            parts.append(self.last[digit])
+        names = self.first[combos]
+
+        for part in reversed(parts):
+            names = np.char.add(np.char.add(names, " "), part)
+
+        return names
+
+    def sample_roles(self, counts):
+        """
+        Disjoint name lists for several roles, given as {role: count}.
+        """
+        return {role: self.sample(n) for role, n in counts.items()}
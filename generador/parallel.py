@@ -0,0 +1,115 @@
+"""
+Multi-process generation of the users dataset in deterministic shards.
+
+The rows are split into shards of a fixed size and every shard gets a seed
+derived from the master seed and its shard number, never from the worker
+that runs it. Shards are merged back in order and the ids and emails are
+made unique in the parent, so the output is the same for any number of
+workers.
+
+Workers send back raw id bytes, separator codes and the fingerprints of
+their email bases, so the merge is a few numpy passes per shard: ids are
+checked on the raw 128-bit values and emails numbered by per-base counters
+split into a fixed number of partitions (see generador.unique.SuffixCounter).
+With an on-disk index the emails of earlier runs must stay taken, so the
+merge falls back to allocating them one by one.
+"""
+import datetime
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from generador.emails import base_fingerprints, join_bases
+from generador.instrument import NO_METRICS
+from generador.names import NamePools
+from generador.pipeline import DEFAULT_CHUNK_SIZE, UniqueColumns, UsersGenerator
+from generador.seeding import MERGE_KEY, SHARD_KEY, derived_seed
+from generador.writers import write_chunks
+
+
+def _generate_shard(args):
+    """
+    Worker entry point: the rows of one shard, without uniqueness checks.
+
+    Returns the columns but id and email, the raw ids, the separator codes
+    and the fingerprints of the email bases.
+    """
+    seed, shard, n, offset, options = args
+
+    generator = UsersGenerator(seed=derived_seed(seed, SHARD_KEY, shard), **options)
+    df, raw, codes = generator.chunk(n, offset, unique=False)
+
+    return df, raw, codes, base_fingerprints(join_bases(df["name"], codes))
+
+
+def generate_shards(num_users, seed=None, workers=None, shard_size=DEFAULT_CHUNK_SIZE,
+                    locale="en_US", now=None, metrics=None, **options):
+    """
+    Yields the dataset shard by shard, generated across worker processes.
+
+    Other options are passed on to the UsersGenerator of every shard. The
+    columns are built in the workers, so a Metrics object only sees the
+    merge step here.
+    """
+    metrics = metrics or NO_METRICS
+
+    # A master seed is needed so every shard derives from the same one
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    if now is None:
+        now = datetime.datetime.now()
+    workers = workers or os.cpu_count()
+
+    # Building the name cache once instead of in every worker
+    NamePools.load(locale)
+
+    # The workers never see the on-disk index, only the merge does
+    unique = UniqueColumns(
+        np.random.default_rng(derived_seed(seed, MERGE_KEY)),
+        options.get("binary_ids"),
+        options.pop("unique_index", None),
+        bloom_error=options.pop("bloom_error", None),
+    )
+
+    options = dict(options, locale=locale, now=now)
+
+    tasks = [
+        (seed, shard, min(shard_size, num_users - offset), offset, options)
+        for shard, offset in enumerate(range(0, num_users, shard_size))
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Keeping a bounded window of shards in flight
+        window = 2 * workers
+        pending = [executor.submit(_generate_shard, task) for task in tasks[:window]]
+        submitted = len(pending)
+
+        while pending:
+            df, raw, codes, fps = pending.pop(0).result()
+
+            if submitted < len(tasks):
+                pending.append(executor.submit(_generate_shard, tasks[submitted]))
+                submitted += 1
+
+            # Merging in shard order keeps the result independent of workers
+            with metrics.stage("merge", len(df)):
+                chunk = unique.merge(df, raw, codes, fps)
+            metrics.counters["emails"] = unique.emails.stats()
+
+            yield chunk
+
+    unique.flush()
+
+
+def generate_parallel(path, num_users, format=None, seed=None, workers=None,
+                      shard_size=DEFAULT_CHUNK_SIZE, writer_options=None, metrics=None,
+                      background=False, **kwargs):
+    """
+    Generates num_users users into a file using several processes.
+    """
+    shards = generate_shards(num_users, seed, workers, shard_size, metrics=metrics, **kwargs)
+
+    return write_chunks(
+        shards, path, format, metrics=metrics, background=background, **(writer_options or {})
+    )
@@ -0,0 +1,84 @@
+"""
+Keyed pseudo-random permutation of [0, size) evaluated in O(1) per index.
+
+A small Feistel network over the smallest even power of two covering size,
+with cycle walking back into range. Distinct inputs always map to distinct
+outputs, which makes it a way of sampling without replacement without
+remembering what was already drawn.
+"""
+import numpy as np
+
+# Multipliers of the splitmix64 finalizer
+_M1 = 0xBF58476D1CE4E5B9
+_M2 = 0x94D049BB133111EB
+
+_MASK64 = (1 << 64) - 1
+
+
+def mix(x):
+    """
+    64-bit finalizer of splitmix64, applied elementwise.
+    """
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(_M1)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(_M2)
+
+    return x ^ (x >> np.uint64(31))
+
+
+def mix_int(x):
+    """
+    The mix of one value, as a Python int.
+    """
+    x = ((x ^ (x >> 30)) * _M1) & _MASK64
+    x = ((x ^ (x >> 27)) * _M2) & _MASK64
+
+    return x ^ (x >> 31)
+
+
+class FeistelPermutation:
+    """
+    Bijection of [0, size) keyed by a seed.
+    """
+
+    def __init__(self, size, seed=None, rounds=4):
+        if size < 1:
+            raise ValueError("size must be positive")
+
+        self.size = int(size)
+
+        # Half width in bits of the Feistel domain
+        bits = max(1, (self.size - 1).bit_length())
+        self._half = (bits + 1) // 2
+        self._half_mask = np.uint64((1 << self._half) - 1)
+
+        keys = np.random.SeedSequence(seed).generate_state(rounds, np.uint64)
+        self._keys = [np.uint64(k) for k in keys]
+
+    def _encrypt(self, x):
+        half = np.uint64(self._half)
+        left = x >> half
+        right = x & self._half_mask
+
+        for key in self._keys:
+            left, right = right, left ^ (mix(right ^ key) & self._half_mask)
+
+        return (left << half) | right
+
+    def __call__(self, indices):
+        """
+        Images of the given indices, as a uint64 array.
+        """
+        x = np.array(indices, dtype=np.uint64, ndmin=1)
+        if x.size and int(x.max()) >= self.size:
+            raise IndexError("index out of range for a permutation of %d" % self.size)
+
+        x = self._encrypt(x)
+
+        # Cycle walking: values that fell outside [0, size) are encrypted again
+        size = np.uint64(self.size)
+        outside = x >= size
+        while outside.any():
+            x[outside] = self._encrypt(x[outside])
+            outside = x >= size
+
+        return x
@@ -0,0 +1,310 @@
+"""
+Streaming generation of the users dataset in fixed-size chunks.
+
+Every chunk goes through all the column generators, from id to rating,
+and is handed to the sink before the next one is built, so memory use
+does not depend on the total number of users. The id and email indexes
+are shared by all chunks and keep both columns unique across them.
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from generador.bios import BIO_LENGTHS, BioEngine
+from generador.columns import ColumnEngine
+from generador.education import AGE_BINS, EDUCATION_LEVELS, ages
+from generador.instrument import NO_METRICS
+from generador.emails import (
+    add_suffixes,
+    allocate_emails,
+    allocate_suffixes,
+    base_fingerprints,
+    join_bases,
+    separator_codes,
+)
+from generador.features import (
+    DOB_END,
+    DOB_START,
+    FEATURES,
+    GENDER_WEIGHTS,
+    GENDERS,
+    LOGIN_END,
+    LOGIN_START,
+    RATING_WEIGHTS,
+    RATINGS,
+)
+from generador.ids import IdIndex, has_arrow, id_column, random_uuid_bytes, unique_ids
+from generador.joint import Conditional, JointModel
+from generador.names import NamePools
+from generador.timestamps import random_dates, random_datetimes
+from generador.unique import SuffixCounter, UniqueAllocator
+from generador.writers import write_chunks
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def _age(df, now):
+    return ages(df["dob"], now)
+
+
+# Columns that depend on another one, see generador.joint. Education is a
+# function of the age bucket, bios are longer for subscribers and the
+# rating does not depend on the subscription yet
+USERS_JOINT = JointModel(
+    {
+        "education": Conditional(
+            "age", EDUCATION_LEVELS, np.eye(len(EDUCATION_LEVELS)), bins=AGE_BINS
+        ),
+        "bio_length": Conditional.from_choices("subscriber", BIO_LENGTHS, dtype=np.int64),
+        "rating": Conditional(
+            "subscriber", RATINGS, {True: RATING_WEIGHTS, False: RATING_WEIGHTS}, dtype=np.int8
+        ),
+    },
+    derived={"age": _age},
+)
+
+# Subscribers rate higher: USERS_JOINT.replace(rating=RATING_BY_SUBSCRIBER)
+RATING_BY_SUBSCRIBER = Conditional(
+    "subscriber", RATINGS, {True: (10, 5, 10, 25, 50), False: (40, 15, 10, 10, 25)}, dtype=np.int8
+)
+
+
+class UniqueColumns:
+    """
+    Indexes that keep the id and email columns unique across chunks.
+    """
+
+    def __init__(self, rng, binary_ids=None, unique_index=None, bloom_error=None, taken=None):
+        # Only used to draw a new id on a duplicate
+        self.rng = rng
+        self.binary_ids = binary_ids
+
+        # Compact ids without pyarrow stay raw bytes, in a virtual column
+        self.raw_ids = binary_ids is None and not has_arrow()
+
+        # In memory, or in a persistent on-disk index (a directory, see
+        # generador.diskindex, with a Bloom filter front of false positive
+        # rate bloom_error if given) for runs too large for RAM. In memory,
+        # emails are numbered by per-base counters on fingerprints, so no
+        # address is kept; addresses are only allocated one by one when
+        # values from elsewhere must stay taken: those of the on-disk index,
+        # or the ones the taken check (a function of an address) reports
+        self.index = None
+        if unique_index is None:
+            self.ids = IdIndex()
+            self.emails = SuffixCounter() if taken is None else UniqueAllocator(taken=taken)
+        else:
+            from generador.diskindex import DiskUniqueIndex
+
+            self.index = DiskUniqueIndex(unique_index, bloom_error=bloom_error)
+            self.ids = self.index.ids
+            self.emails = UniqueAllocator(used=self.index.emails)
+
+    def id_column(self, raw):
+        """
+        Column of raw ids, after drawing again the ones already taken: an
+        IdColumn (see generador.virtual) when they stay raw bytes.
+        """
+        # Checked on the raw values, whatever the column holds
+        raw = unique_ids(raw, self.ids, self.rng)
+
+        if self.raw_ids:
+            from generador.virtual import IdColumn
+
+            return IdColumn(raw)
+
+        return id_column(raw, self.binary_ids)
+
+    def email_column(self, bases):
+        """
+        Unique emails for local parts, numbered in row order when taken.
+        """
+        if isinstance(self.emails, SuffixCounter):
+            return add_suffixes(bases, self.email_suffixes(bases))
+
+        return allocate_emails(bases, self.emails)
+
+    def email_suffixes(self, bases, fps=None):
+        """
+        Same allocation as email_column, keeping only the added numbers.
+        fps, the base_fingerprints of bases, saves hashing them again.
+        """
+        if isinstance(self.emails, SuffixCounter):
+            return self.emails.number(base_fingerprints(bases) if fps is None else fps)
+
+        return allocate_suffixes(bases, self.emails)
+
+    def merge(self, df, raw, codes, fps=None):
+        """
+        Completes a chunk drawn with unique=False: records its raw ids and
+        allocates its emails, in row order, adding both columns to df (or
+        returning a LazyFrame when the ids stay raw).
+        """
+        bases = join_bases(df["name"], codes)
+        emails = add_suffixes(bases, self.email_suffixes(bases, fps))
+        df.insert(df.columns.get_loc("name") + 1, "email", emails)
+
+        ids = self.id_column(raw)
+        if self.raw_ids:
+            from generador.virtual import LazyFrame
+
+            return LazyFrame(df, {"id": ids}, FEATURES)
+
+        df.insert(0, "id", ids)
+
+        return df
+
+    def flush(self):
+        """
+        Saves the on-disk index, if any.
+        """
+        if self.index is not None:
+            self.index.flush()
+
+
+class UsersGenerator:
+    """
+    Builds chunks of the users dataset sharing one seeded state.
+    """
+
+    def __init__(self, seed=None, locale="en_US", now=None, arrow_strings=False,
+                 binary_ids=None, metrics=None, unique_index=None, joint=None, lazy=False,
+                 bloom_error=None):
+        self.engine = ColumnEngine(seed)
+        self.name_pools = NamePools.load(locale)
+
+        # Conditional tables of education, bio length and rating
+        self.joint = joint or USERS_JOINT
+
+        self.bio_engine = BioEngine(locale, self.joint["bio_length"])
+
+        # Keeping the bios as one Arrow buffer per chunk (needs pyarrow)
+        self.arrow_strings = arrow_strings
+
+        # Reference date for every education level of the run
+        self.now = now if now is not None else datetime.datetime.now()
+
+        # Ids as Arrow fixed_size_binary(16) (True, needs pyarrow) or hex text
+        # (False); by default binary, or raw bytes when pyarrow is missing
+        self.binary_ids = binary_ids
+
+        # Indexes shared by all the chunks, persisted in the unique_index
+        # directory when given. Lazy chunks keep no address strings, so
+        # neither does their index: emails are numbered by per-base counters
+        self.unique = UniqueColumns(
+            self.engine.rng, binary_ids, unique_index, bloom_error=bloom_error
+        )
+
+        # Per-stage timings, see generador.instrument
+        self.metrics = metrics or NO_METRICS
+
+        # Chunks as LazyFrames with email and education left virtual, see
+        # generador.virtual
+        self.lazy = lazy
+
+    def make_bios(self, subscriber):
+        """
+        Short or long bios depending on the subscription status.
+        """
+        bios = self.bio_engine.bios(self.engine.rng, subscriber, as_arrow=self.arrow_strings)
+
+        if self.arrow_strings:
+            import pyarrow as pa
+
+            return pd.arrays.ArrowStringArray(pa.chunked_array([bios]))
+
+        return bios
+
+    def chunk(self, n, offset=0, unique=True):
+        """
+        One chunk of n users, indexed from offset.
+
+        With unique=False the id and email columns are left out and
+        (df, raw ids, separator codes) is returned, for UniqueColumns.merge
+        to finish. With lazy (and unique), or ids kept as raw bytes, a
+        LazyFrame is returned instead of a DataFrame.
+        """
+        engine = self.engine
+        stage = self.metrics.stage
+        df = pd.DataFrame(index=pd.RangeIndex(offset, offset + n))
+
+        lazy = self.lazy and unique
+        virtual = {}
+
+        with stage("id", n):
+            raw = random_uuid_bytes(engine.rng, n)
+            if unique and self.unique.raw_ids:
+                virtual["id"] = self.unique.id_column(raw)
+            elif unique:
+                df["id"] = self.unique.id_column(raw)
+        with stage("gender", n):
+            df["gender"] = engine.categorical(GENDERS, n, weights=GENDER_WEIGHTS)
+        with stage("subscriber", n):
+            df["subscriber"] = engine.boolean(n)
+        with stage("name", n):
+            df["name"] = self.name_pools.full_names(engine.rng, df["gender"])
+        with stage("email", n):
+            codes = separator_codes(engine.rng, n)
+            if lazy:
+                from generador.virtual import EmailColumn
+
+                bases = join_bases(df["name"], codes)
+                virtual["email"] = EmailColumn(codes, self.unique.email_suffixes(bases))
+            elif unique:
+                df["email"] = self.unique.email_column(join_bases(df["name"], codes))
+        with stage("last_login", n):
+            df["last_login"] = random_datetimes(engine.rng, LOGIN_START, LOGIN_END, n)
+        with stage("dob", n):
+            df["dob"] = random_dates(engine.rng, DOB_START, DOB_END, n)
+        with stage("education", n):
+            if lazy and self.joint["education"].deterministic:
+                from generador.virtual import ConditionalColumn
+
+                virtual["education"] = ConditionalColumn(self.joint, "education", self.now)
+            else:
+                df["education"] = self.joint.sample("education", engine.rng, df, self.now)
+        with stage("bio", n):
+            df["bio"] = self.make_bios(df["subscriber"].to_numpy())
+        with stage("rating", n):
+            df["rating"] = self.joint.sample("rating", engine.rng, df)
+
+        if not unique:
+            return df, raw, codes
+
+        self.metrics.counters["emails"] = self.unique.emails.stats()
+
+        if virtual:
+            from generador.virtual import LazyFrame
+
+            return LazyFrame(df, virtual, FEATURES)
+
+        return df
+
+    def chunks(self, num_users, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Yields the dataset as consecutive chunks of at most chunk_size rows.
+        """
+        for offset in range(0, num_users, chunk_size):
+            yield self.chunk(min(chunk_size, num_users - offset), offset)
+
+        self.unique.flush()
+
+
+def generate(path, num_users, format=None, chunk_size=DEFAULT_CHUNK_SIZE, seed=None,
+             writer_options=None, metrics=None, background=False, **kwargs):
+    """
+    Generates num_users users straight into a file, chunk by chunk.
+
+    The format (csv, parquet, feather, xlsx) is guessed from the extension
+    when not given; writer_options are passed on to the writer. A Metrics
+    object, when given, collects the timings of every stage. With
+    background, chunks are written on a separate thread while the next ones
+    are generated.
+    """
+    generator = UsersGenerator(seed=seed, metrics=metrics, **kwargs)
+    chunks = generator.chunks(num_users, chunk_size)
+
+    return write_chunks(
+        chunks, path, format, metrics=metrics, background=background, **(writer_options or {})
+    )
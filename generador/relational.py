@@ -0,0 +1,170 @@
+"""
+Related tables: the roles of DatosS.py and the users, linked by foreign keys.
+
+Every table but users has a dense integer key "id" (1 to rows); users
+keeps the uuid "id" of the users dataset, as no table links to it. Child
+tables have a foreign key to a parent declared before them, computed
+from the row number alone, so any range of rows is generated on its own
+and every key points to an existing parent row by construction:
+
+- unique links (an empleado is one persona, no two share it) take the
+  parent rows in the order of a keyed permutation of the parent keys;
+  siblings of the same parent get consecutive ranges of it, so they
+  never share a parent row either (a bombero is not also a policia);
+- other links (many users per persona) hash the row number into the
+  parent key range.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from generador.names import UniqueNameSampler
+from generador.permutation import FeistelPermutation, mix
+from generador.pipeline import DEFAULT_CHUNK_SIZE, UsersGenerator
+from generador.seeding import RELATIONAL_KEY, derived_seed
+from generador.writers import EXTENSIONS, write_chunks
+
+# {table: spec}, parents first. rows is the cardinality of the table;
+# parent, key and unique describe its foreign key; kind "personas" adds a
+# unique Spanish name, kind "users" the columns of the users dataset
+TABLES = {
+    "personas": {"rows": 20_000, "kind": "personas"},
+    "empleados": {"rows": 5_000, "parent": "personas", "key": "persona_id", "unique": True},
+    "bomberos": {"rows": 1_000, "parent": "empleados", "key": "empleado_id", "unique": True},
+    "policia": {"rows": 1_000, "parent": "empleados", "key": "empleado_id", "unique": True},
+    "users": {"rows": 20_000, "parent": "personas", "key": "persona_id", "kind": "users"},
+}
+
+
+class RelationalGenerator:
+    """
+    Generates the tables of a relational dataset chunk by chunk.
+    """
+
+    def __init__(self, tables=TABLES, seed=None, locale="es_ES", **users_options):
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+
+        self.tables = dict(tables)
+        self.seed = seed
+        self.locale = locale
+        self.users_options = users_options
+
+        # Position of every table, for its seeds
+        self._positions = {name: i for i, name in enumerate(self.tables)}
+
+        # Start of every unique child in the permutation of its parent
+        self._ranges = {}
+        taken = {}
+        for name, spec in self.tables.items():
+            parent = spec.get("parent")
+            if parent is None:
+                continue
+            if parent not in self._positions or self._positions[parent] > self._positions[name]:
+                raise ValueError("parent %r of %r must be declared before it" % (parent, name))
+
+            if spec.get("unique", False):
+                start = taken.get(parent, 0)
+                taken[parent] = start + spec["rows"]
+                if taken[parent] > self.tables[parent]["rows"]:
+                    raise ValueError(
+                        "unique links to %r need more than its %d rows"
+                        % (parent, self.tables[parent]["rows"])
+                    )
+                self._ranges[name] = start
+
+    def _seed(self, table, *key):
+        return derived_seed(self.seed, RELATIONAL_KEY, self._positions[table], *key)
+
+    def foreign_keys(self, table, start, stop):
+        """
+        Foreign key of rows [start, stop) of a child table.
+        """
+        spec = self.tables[table]
+        parent_rows = self.tables[spec["parent"]]["rows"]
+        rows = np.arange(start, stop, dtype=np.uint64)
+
+        if spec.get("unique", False):
+            permutation = FeistelPermutation(parent_rows, self._seed(spec["parent"], 1))
+            index = permutation(rows + np.uint64(self._ranges[table]))
+        else:
+            index = mix(rows ^ np.uint64(self._seed(table, 1))) % np.uint64(parent_rows)
+
+        return index.astype(np.int64) + 1
+
+    def chunks(self, table, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Yields the rows of a table as consecutive chunks.
+        """
+        spec = self.tables[table]
+        kind = spec.get("kind")
+
+        names = None
+        users = None
+        if kind == "personas":
+            names = UniqueNameSampler(self.locale, seed=self._seed(table))
+        elif kind == "users":
+            # Names (and bios) of the same locale as the personas they link to
+            users = UsersGenerator(
+                seed=self._seed(table), locale=self.locale, **self.users_options
+            )
+
+        for start in range(0, spec["rows"], chunk_size):
+            stop = min(start + chunk_size, spec["rows"])
+
+            if users is not None:
+                df = users.chunk(stop - start, start)
+            else:
+                df = pd.DataFrame(
+                    {"id": np.arange(start + 1, stop + 1, dtype=np.int64)},
+                    index=pd.RangeIndex(start, stop),
+                )
+
+            if names is not None:
+                df["nombre"] = names.sample(stop - start)
+            if spec.get("parent") is not None:
+                df[spec["key"]] = self.foreign_keys(table, start, stop)
+
+            yield df
+
+        if users is not None:
+            users.unique.flush()
+
+
+def generate_relational(path, tables=TABLES, format=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                        seed=None, writer_options=None, metrics=None, **kwargs):
+    """
+    Writes every table of a relational dataset. Returns {table: rows}.
+
+    A SQLite path (.db, .sqlite, .sqlite3 or format="sqlite") gets one table
+    each, with indexes on the keys built after the load; any other path is
+    a directory receiving one file per table, in format (csv by default).
+    """
+    generator = RelationalGenerator(tables, seed, **kwargs)
+
+    extension = os.path.splitext(path)[1].lower()
+    sqlite = (format or EXTENSIONS.get(extension)) == "sqlite"
+    if not sqlite:
+        format = format or "csv"
+        os.makedirs(path, exist_ok=True)
+
+    rows = {}
+    for table, spec in generator.tables.items():
+        options = dict(writer_options or {})
+        key = [spec["key"]] if spec.get("parent") is not None else []
+
+        if sqlite:
+            target = path
+            options = dict({"table": table, "indexes": key}, **options)
+        else:
+            target = os.path.join(path, "%s.%s" % (table, format))
+            if format == "csv":
+                # The id column already numbers the rows
+                options.setdefault("index", False)
+
+        rows[table] = write_chunks(
+            generator.chunks(table, chunk_size), target, format, metrics=metrics, **options
+        )
+
+    return rows
@@ -0,0 +1,349 @@
+"""
+Declarative schemas compiled into a column generation plan.
+
+A schema names every column with its generator, parameters, dtype and the
+columns it depends on. compile_schema() orders the columns into levels of a
+dependency graph, drops the ones nothing requested needs, and returns a Plan
+that generates whole chunks level by level, running the independent columns
+of a level concurrently.
+
+numpy and pandas are only imported when a plan runs, so reading and
+listing schemas stays cheap.
+"""
+import datetime
+import functools
+import json
+import zlib
+
+from generador.features import (
+    DOB_END,
+    DOB_START,
+    DOMAIN,
+    GENDER_WEIGHTS,
+    GENDERS,
+    LOGIN_END,
+    LOGIN_START,
+    RATING_WEIGHTS,
+    RATINGS,
+)
+
+# The users dataset of datos.py, with the distributions of generador.pipeline
+USERS_SCHEMA = {
+    "name": "users",
+    "columns": {
+        "id": {"generator": "uuid", "unique": True},
+        "gender": {
+            "generator": "categorical",
+            "values": list(GENDERS),
+            "weights": list(GENDER_WEIGHTS),
+        },
+        "subscriber": {"generator": "boolean"},
+        "name": {"generator": "full_name", "depends_on": ["gender"]},
+        "email": {"generator": "email", "depends_on": ["name"], "unique": True},
+        "last_login": {
+            "generator": "datetime",
+            "start": LOGIN_START,
+            "end": LOGIN_END,
+        },
+        "dob": {"generator": "date", "start": DOB_START, "end": DOB_END},
+        "education": {"generator": "education", "depends_on": ["dob"]},
+        "bio": {"generator": "bio", "depends_on": ["subscriber"]},
+        "rating": {
+            "generator": "integer",
+            "values": list(RATINGS),
+            "weights": list(RATING_WEIGHTS),
+            "dtype": "int8",
+        },
+    },
+}
+
+# Keys of a column spec that are not parameters of its generator
+_SPEC_KEYS = {"generator", "depends_on", "dtype", "unique"}
+
+# Registered column generators: name -> function(ctx, n, *inputs, **params)
+GENERATORS = {}
+
+
+def generator(name):
+    """
+    Registers a column generator under the given name.
+    """
+    def register(fn):
+        GENERATORS[name] = fn
+        return fn
+
+    return register
+
+
+@generator("uuid")
+def _uuid(ctx, n, binary=False):
+    from generador.ids import id_column, random_uuid_bytes
+
+    return id_column(random_uuid_bytes(ctx.rng, n), binary)
+
+
+@generator("categorical")
+def _categorical(ctx, n, values, weights=None):
+    return ctx.engine.categorical(values, n, weights)
+
+
+@generator("boolean")
+def _boolean(ctx, n, weights=None):
+    return ctx.engine.boolean(n, weights)
+
+
+@generator("integer")
+def _integer(ctx, n, values, weights=None):
+    import numpy as np
+
+    # The schema gives the dtype of the column, not ColumnEngine's int8
+    return ctx.engine.integer(values, n, weights, dtype=np.asarray(values).dtype)
+
+
+@functools.lru_cache(maxsize=None)
+def name_pools(locale):
+    """
+    NamePools of a locale, loaded once per process.
+    """
+    from generador.names import NamePools
+
+    return NamePools.load(locale)
+
+
+@functools.lru_cache(maxsize=None)
+def bio_engine(locale):
+    """
+    BioEngine of a locale, built once per process.
+    """
+    from generador.bios import BioEngine
+
+    return BioEngine(locale)
+
+
+@generator("full_name")
+def _full_name(ctx, n, gender, locale="en_US", surnames=1):
+    return name_pools(locale).full_names(ctx.rng, gender, surnames)
+
+
+@generator("email")
+def _email(ctx, n, name, domain=DOMAIN):
+    from generador.emails import email_bases
+
+    return [base + domain for base in email_bases(ctx.rng, name)]
+
+
+@generator("datetime")
+def _datetime(ctx, n, start, end):
+    from generador.timestamps import random_datetimes
+
+    return random_datetimes(ctx.rng, start, end, n)
+
+
+@generator("date")
+def _date(ctx, n, start, end):
+    from generador.timestamps import random_dates
+
+    return random_dates(ctx.rng, start, end, n)
+
+
+@generator("education")
+def _education(ctx, n, dob):
+    from generador.education import classify_education
+
+    return classify_education(dob, ctx.now)
+
+
+@generator("bio")
+def _bio(ctx, n, subscriber, locale="en_US"):
+    return bio_engine(locale).bios(ctx.rng, subscriber)
+
+
+def load_schema(path):
+    """
+    Reads a schema from a YAML (needs pyyaml) or JSON file.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+
+            return yaml.safe_load(f)
+
+        return json.load(f)
+
+
+class _Context:
+    """
+    State of one column across chunks: its random stream and reference date.
+
+    engine draws from the same stream, as a ColumnEngine.
+    """
+
+    def __init__(self, rng, now):
+        from generador.columns import ColumnEngine
+
+        self.rng = rng
+        self.now = now
+        self.engine = ColumnEngine(rng)
+
+
+class Plan:
+    """
+    Compiled schema: columns grouped into levels of the dependency graph.
+    """
+
+    def __init__(self, specs, levels, output, seed=None, now=None, workers=None):
+        import numpy as np
+
+        from generador.ids import IdIndex
+        from generador.unique import UniqueAllocator
+
+        self.specs = specs
+        self.levels = levels
+        self.output = output
+        self.workers = workers
+
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        if now is None:
+            now = datetime.datetime.now()
+
+        # One random stream per column, keyed by its name, so the values do
+        # not depend on the order the columns run in
+        self._contexts = {
+            name: _Context(
+                np.random.default_rng(
+                    np.random.SeedSequence(seed, spawn_key=(zlib.crc32(name.encode()),))
+                ),
+                now,
+            )
+            for level in levels
+            for name in level
+        }
+
+        self._unique = {
+            name: IdIndex() if spec["generator"] == "uuid" else UniqueAllocator()
+            for name, spec in specs.items()
+            if spec.get("unique")
+        }
+
+    def _generate(self, name, n, columns):
+        spec = self.specs[name]
+        params = {k: v for k, v in spec.items() if k not in _SPEC_KEYS}
+        inputs = [columns[dep] for dep in spec.get("depends_on", [])]
+
+        values = GENERATORS[spec["generator"]](self._contexts[name], n, *inputs, **params)
+
+        if "dtype" in spec:
+            import numpy as np
+
+            values = np.asarray(values).astype(spec["dtype"])
+
+        return values
+
+    def _make_unique(self, name, values):
+        """
+        Adds a numeric suffix to values already handed out, in this chunk
+        or an earlier one.
+        """
+        allocator = self._unique[name]
+
+        # Ids are checked on their raw 128-bit values and drawn again instead
+        if self.specs[name]["generator"] == "uuid":
+            from generador.ids import id_bytes, id_column, unique_ids
+
+            raw = unique_ids(id_bytes(values), allocator, self._contexts[name].rng)
+            return id_column(raw, self.specs[name].get("binary", False))
+
+        values = list(values)
+
+        for i, value in enumerate(values):
+            if not allocator.reserve(value):
+                # Numbers go before the domain of emails
+                base, at, domain = value.partition("@")
+                values[i] = allocator.allocate(base, suffix=at + domain)
+
+        return values
+
+    def chunk(self, n, offset=0):
+        """
+        One chunk of n rows, indexed from offset.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        import pandas as pd
+
+        columns = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for level in self.levels:
+                if len(level) == 1:
+                    results = [self._generate(level[0], n, columns)]
+                else:
+                    # Columns of one level only read earlier levels
+                    futures = [executor.submit(self._generate, name, n, columns) for name in level]
+                    results = [f.result() for f in futures]
+
+                for name, values in zip(level, results):
+                    if name in self._unique:
+                        values = self._make_unique(name, values)
+                    columns[name] = values
+
+        df = pd.DataFrame(index=pd.RangeIndex(offset, offset + n))
+        for name in self.output:
+            df[name] = columns[name]
+
+        return df
+
+    def chunks(self, num_users, chunk_size=100_000):
+        """
+        Yields consecutive chunks of at most chunk_size rows.
+        """
+        for offset in range(0, num_users, chunk_size):
+            yield self.chunk(min(chunk_size, num_users - offset), offset)
+
+
+def compile_schema(schema, columns=None, seed=None, now=None, workers=None):
+    """
+    Validates a schema and compiles it into a Plan.
+
+    Only the requested columns (all by default) and the columns they depend
+    on are generated; only the requested ones are kept in the output.
+    """
+    specs = schema["columns"]
+    output = list(columns) if columns is not None else list(specs)
+
+    for name, spec in specs.items():
+        if spec.get("generator") not in GENERATORS:
+            raise ValueError("column %r: unknown generator %r" % (name, spec.get("generator")))
+        for dep in spec.get("depends_on", []):
+            if dep not in specs:
+                raise ValueError("column %r depends on unknown column %r" % (name, dep))
+
+    # Columns reachable from the requested ones
+    needed = set()
+    stack = list(output)
+    while stack:
+        name = stack.pop()
+        if name not in specs:
+            raise ValueError("unknown column %r" % name)
+        if name not in needed:
+            needed.add(name)
+            stack.extend(specs[name].get("depends_on", []))
+
+    # Levels of the dependency graph, in schema order within a level
+    levels = []
+    done = set()
+    pending = [name for name in specs if name in needed]
+    while pending:
+        level = [
+            name for name in pending
+            if all(dep in done for dep in specs[name].get("depends_on", []))
+        ]
+        if not level:
+            raise ValueError("dependency cycle between columns %s" % ", ".join(pending))
+
+        levels.append(level)
+        done.update(level)
+        pending = [name for name in pending if name not in done]
+
+    return Plan(specs, levels, output, seed=seed, now=now, workers=workers)
@@ -0,0 +1,220 @@
+"""
+Seeds of the package, and counter-based generation of any row range of
+the users dataset on demand.
+
+derived_seed() turns the master seed of a run into the seed of one part
+of it, such as a shard, each kind of part in its own key space, so no two
+parts ever share a random stream.
+
+Every column draws from its own Philox stream keyed by (master seed,
+column) and uses a fixed number of 64-bit words per row, so the words of
+row i start at counter position i * words. Rows start..stop are rebuilt by
+jumping straight there, in O(1) with respect to start, and are identical
+to the same rows of a full run with the same seed.
+
+Because rows never see each other, emails are unique by construction: the
+row number is appended to every local part. The reference date of the
+education column is fixed (the end of the login window by default) so
+that it does not change between runs.
+"""
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from generador.bios import BIO_LENGTHS, BioEngine
+from generador.education import classify_education
+from generador.emails import SEPARATORS, add_suffixes, join_bases
+from generador.features import (
+    DOB_END,
+    DOB_START,
+    GENDER_WEIGHTS,
+    GENDERS,
+    LOGIN_END,
+    LOGIN_START,
+    RATING_WEIGHTS,
+    RATINGS,
+)
+from generador.ids import ID_SIZE, id_column, set_uuid4_bits
+from generador.names import NamePools
+from generador.timestamps import DATE_FORMAT, TIME_FORMAT, to_datetime64
+
+# Separate key spaces of derived_seed: the shard seeds and the seed of the
+# merge step of generador.parallel, the seed of the login events
+# (generador.logins) and the seeds of the tables of generador.relational
+SHARD_KEY = 0
+MERGE_KEY = 1
+LOGINS_KEY = 2
+RELATIONAL_KEY = 3
+
+# 64-bit words every column uses per row
+COLUMN_WORDS = {
+    "id": 2,
+    "gender": 1,
+    "subscriber": 1,
+    "name": 2,
+    "email": 1,
+    "last_login": 1,
+    "dob": 1,
+    # length, +/-40% factor and up to 30 words
+    "bio": 32,
+    "rating": 1,
+}
+
+# Words per Philox counter step
+_BLOCK = 4
+
+
+def derived_seed(seed, *key):
+    """
+    Seed derived from the master seed and a key, such as a shard number.
+    """
+    sequence = np.random.SeedSequence(seed, spawn_key=key)
+
+    return int(sequence.generate_state(1, np.uint64)[0])
+
+
+def _uniform(words):
+    """
+    Floats in [0, 1) from the top 53 bits of 64-bit words.
+    """
+    return (words >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+def _below(words, k):
+    """
+    Integers in [0, k) from 64-bit words.
+    """
+    return (_uniform(words) * k).astype(np.int64)
+
+
+def _weighted(words, weights):
+    """
+    Indices drawn with the given (unnormalized) weights.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    cdf = np.cumsum(weights / weights.sum())
+    cdf[-1] = 1.0
+
+    return np.searchsorted(cdf, _uniform(words), side="right")
+
+
+class CounterGenerator:
+    """
+    Users rows as a pure function of (seed, row index, column).
+    """
+
+    def __init__(self, seed, locale="en_US", now=LOGIN_END, binary_ids=False):
+        self.seed = seed
+        self.name_pools = NamePools.load(locale)
+        self.bio_engine = BioEngine(locale)
+        self.now = to_datetime64(now, TIME_FORMAT, "s")
+        self.binary_ids = binary_ids
+
+        # Philox key of every column
+        self._keys = {
+            column: np.random.SeedSequence(
+                seed, spawn_key=(zlib.crc32(column.encode()),)
+            ).generate_state(2, np.uint64)
+            for column in COLUMN_WORDS
+        }
+
+    def words(self, column, start, stop):
+        """
+        (stop - start, k) array of the random words of a column for a row range.
+        """
+        k = COLUMN_WORDS[column]
+        first = start * k
+        block, skip = divmod(first, _BLOCK)
+
+        bit_generator = np.random.Philox(key=self._keys[column], counter=block)
+        raw = bit_generator.random_raw(skip + (stop - start) * k)[skip:]
+
+        return raw.reshape(stop - start, k)
+
+    def _ids(self, start, stop):
+        raw = self.words("id", start, stop).view(np.uint8).reshape(-1, ID_SIZE).copy()
+
+        return id_column(set_uuid4_bits(raw), self.binary_ids)
+
+    def _names(self, start, stop, gender):
+        words = self.words("name", start, stop)
+
+        first = self.name_pools.first_names(None, gender, uniforms=_uniform(words[:, 0]))
+        last = self.name_pools.pick("last", _uniform(words[:, 1]))
+
+        return np.char.add(np.char.add(first, " "), last)
+
+    def _emails(self, start, stop, names):
+        codes = _below(self.words("email", start, stop)[:, 0], len(SEPARATORS))
+
+        # The row number makes every address unique
+        return add_suffixes(join_bases(names, codes), np.arange(start, stop))
+
+    def _datetimes(self, column, start, stop, begin, end, frmt, unit):
+        begin = to_datetime64(begin, frmt, unit)
+        span = int((to_datetime64(end, frmt, unit) - begin).astype(np.int64))
+        offsets = _below(self.words(column, start, stop)[:, 0], span)
+
+        return begin + offsets.astype("timedelta64[%s]" % unit)
+
+    def _bios(self, start, stop, subscriber):
+        words = self.words("bio", start, stop)
+        subscriber = np.asarray(subscriber, dtype=bool)
+
+        base = np.empty(len(subscriber), dtype=np.int64)
+        for status, (choices, weights) in BIO_LENGTHS.items():
+            mask = subscriber == status
+            base[mask] = np.asarray(choices)[_weighted(words[mask, 0], weights)]
+
+        factor = 60 + _below(words[:, 1], 81)
+        nb_words = np.maximum(base * factor // 100, 1)
+
+        # The first nb_words of the remaining words of every row
+        slots = words[:, 2:]
+        used = np.arange(slots.shape[1]) < nb_words[:, None]
+        ids = _below(slots[used], self.bio_engine.n_words)
+
+        offsets, data = self.bio_engine.assemble(nb_words, ids)
+
+        return self.bio_engine.render(offsets, data)
+
+    def rows(self, start, stop):
+        """
+        Rows start..stop (excluded) of the dataset, indexed by row number.
+        """
+        df = pd.DataFrame(index=pd.RangeIndex(start, stop))
+
+        df["id"] = self._ids(start, stop)
+        df["gender"] = pd.Categorical.from_codes(
+            _weighted(self.words("gender", start, stop)[:, 0], GENDER_WEIGHTS).astype(np.int8),
+            categories=GENDERS,
+        )
+        df["subscriber"] = _uniform(self.words("subscriber", start, stop)[:, 0]) < 0.5
+        df["name"] = self._names(start, stop, df["gender"])
+        df["email"] = self._emails(start, stop, df["name"])
+        df["last_login"] = self._datetimes(
+            "last_login", start, stop, LOGIN_START, LOGIN_END, TIME_FORMAT, "s"
+        )
+        df["dob"] = self._datetimes("dob", start, stop, DOB_START, DOB_END, DATE_FORMAT, "D")
+        df["education"] = classify_education(df["dob"], self.now)
+        df["bio"] = self._bios(start, stop, df["subscriber"].to_numpy())
+        df["rating"] = np.asarray(RATINGS, dtype=np.int8)[
+            _weighted(self.words("rating", start, stop)[:, 0], RATING_WEIGHTS)
+        ]
+
+        return df
+
+    def row(self, index):
+        """
+        A single row, as a one-row DataFrame.
+        """
+        return self.rows(index, index + 1)
+
+    def chunks(self, num_users, chunk_size=100_000, start=0):
+        """
+        Yields rows start..start + num_users in chunks, for the writers.
+        """
+        stop = start + num_users
+        for offset in range(start, stop, chunk_size):
+            yield self.rows(offset, min(offset + chunk_size, stop))
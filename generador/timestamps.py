@@ -0,0 +1,64 @@
+"""
+Vectorized generation of random timestamps and dates.
+
+Values are kept as native datetime64 arrays; text is only produced by
+format_datetimes, at export time.
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+# Formats used by the notebook
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def to_datetime64(value, frmt, unit):
+    """
+    Converts a string in the given format (or a datetime) to datetime64.
+    """
+    if isinstance(value, str):
+        value = datetime.datetime.strptime(value, frmt)
+
+    return np.datetime64(value, unit)
+
+
+def random_datetimes(rng, start, end, n, frmt=TIME_FORMAT, unit="s"):
+    """
+    Draws n uniform datetime64[unit] values in [start, end).
+    """
+    stime = to_datetime64(start, frmt, unit)
+    etime = to_datetime64(end, frmt, unit)
+
+    # Size of the pool in whole units
+    span = (etime - stime).astype(np.int64)
+    if span <= 0:
+        raise ValueError("end must be after start")
+
+    offsets = rng.integers(0, span, size=n, dtype=np.int64)
+
+    return stime + offsets.astype("timedelta64[%s]" % unit)
+
+
+def random_dates(rng, start, end, n, frmt=DATE_FORMAT):
+    """
+    Draws n uniform datetime64[D] dates in [start, end).
+    """
+    return random_datetimes(rng, start, end, n, frmt=frmt, unit="D")
+
+
+def format_datetimes(values, frmt=TIME_FORMAT):
+    """
+    Renders datetime64 values as strings, for export only.
+    """
+    values = np.asarray(values)
+
+    # numpy renders ISO 8601 directly, which covers both notebook formats
+    if frmt == TIME_FORMAT:
+        text = np.datetime_as_string(values.astype("datetime64[s]"))
+        return np.char.replace(text, "T", " ")
+    if frmt == DATE_FORMAT:
+        return np.datetime_as_string(values.astype("datetime64[D]"))
+
+    return pd.Series(values).dt.strftime(frmt).to_numpy()
@@ -0,0 +1,225 @@
+"""
+Allocation of unique values (emails, usernames, ...) backed by a hash index.
+"""
+import numpy as np
+
+from generador.diskindex import EMPTY, MAX_LOAD, find_or_insert
+from generador.emails import NO_SUFFIX
+
+# Partitions of a SuffixCounter. Fixed, so the numbers never depend on how
+# many workers feed it
+EMAIL_PARTITIONS = 16
+
+
+class UniqueAllocator:
+    """
+    Hands out unique values built from a base string.
+
+    The first request for a base gets the base itself. Later requests for the
+    same base get a numeric suffix taken from a per-base counter, so
+    collisions are resolved deterministically and never loop forever.
+    """
+
+    def __init__(self, first_suffix=1, taken=None, used=None):
+        # Every value handed out so far: a set, or any container with the
+        # same "in" and add(), such as an on-disk index
+        self._used = set() if used is None else used
+
+        # Optional check for values used outside the allocator, such as the
+        # rows of an existing file
+        self._taken = taken
+
+        # Next numeric suffix to try for each base
+        self._counters = {}
+
+        self._first_suffix = first_suffix
+
+        # Collision statistics
+        self._collisions = 0
+        self._probes = 0
+        self._max_suffix = 0
+
+    def __contains__(self, value):
+        return value in self._used or (self._taken is not None and self._taken(value))
+
+    def __len__(self):
+        return len(self._used)
+
+    def reserve(self, value):
+        """
+        Marks an already existing value as used. Returns False if it was taken.
+        """
+        if value in self:
+            return False
+
+        self._used.add(value)
+        return True
+
+    def allocate(self, base, suffix=""):
+        """
+        Returns a unique value of the form base + [number] + suffix.
+        """
+        value = base + suffix
+
+        if value not in self:
+            self._used.add(value)
+            return value
+
+        self._collisions += 1
+
+        # Resuming from where the last collision on this base stopped
+        num = self._counters.get(base, self._first_suffix)
+
+        while True:
+            self._probes += 1
+            value = base + str(num) + suffix
+            num += 1
+
+            if value not in self:
+                break
+
+        self._counters[base] = num
+        self._max_suffix = max(self._max_suffix, num - 1)
+        self._used.add(value)
+
+        return value
+
+    def stats(self):
+        """
+        Collision statistics of the values allocated so far.
+        """
+        allocated = len(self._used)
+
+        return {
+            "allocated": allocated,
+            "collisions": self._collisions,
+            "collision_rate": self._collisions / allocated if allocated else 0.0,
+            "probes": self._probes,
+            "bases_with_collisions": len(self._counters),
+            "max_suffix": self._max_suffix,
+        }
+
+
+class _CountTable:
+    """
+    Occurrence counts of 64-bit fingerprints in an open-addressing table.
+    """
+
+    def __init__(self, capacity=1 << 12):
+        self.keys = np.zeros(capacity, dtype=np.uint64)
+        self.counts = np.zeros(capacity, dtype=np.int64)
+        self.used = 0
+
+    def _slots(self, keys):
+        """
+        Slot of every (distinct, nonzero) key, inserting the missing ones.
+        """
+        if self.used + len(keys) > MAX_LOAD * len(self.keys):
+            self._grow(self.used + len(keys))
+
+        slots, found = find_or_insert(self.keys, keys)
+        self.used += len(keys) - int(found.sum())
+
+        return slots
+
+    def _grow(self, used):
+        capacity = len(self.keys)
+        while used > MAX_LOAD * capacity:
+            capacity *= 2
+
+        filled = self.keys != EMPTY
+        keys, counts = self.keys[filled], self.counts[filled]
+
+        self.keys = np.zeros(capacity, dtype=np.uint64)
+        self.counts = np.zeros(capacity, dtype=np.int64)
+        self.used = 0
+
+        self.counts[self._slots(keys)] = counts
+
+    def add(self, keys, counts):
+        """
+        Adds counts to (distinct, nonzero) keys. Returns their counts before.
+        """
+        slots = self._slots(keys)
+        before = self.counts[slots]
+        self.counts[slots] = before + counts
+
+        return before
+
+
+class SuffixCounter:
+    """
+    Numbers repeated bases by counting them, keyed on 64-bit fingerprints
+    of the bases instead of the strings.
+
+    The k-th repeat of a base gets first_suffix + k - 1, the number a
+    UniqueAllocator hands out as long as no base ends in a digit (names
+    never do), so the addresses are the same without keeping any of them.
+    The counts are split by fingerprint into a fixed number of partitions;
+    two bases sharing a fingerprint only get a number they did not need.
+    """
+
+    def __init__(self, partitions=EMAIL_PARTITIONS, first_suffix=1):
+        self._tables = [_CountTable() for _ in range(partitions)]
+        self._first_suffix = first_suffix
+
+        # Collision statistics, as in UniqueAllocator.stats()
+        self._allocated = 0
+        self._collisions = 0
+        self._bases_with_collisions = 0
+        self._max_suffix = 0
+
+    def __len__(self):
+        return self._allocated
+
+    def number(self, fps):
+        """
+        Numbers of a batch of base fingerprints, in row order: NO_SUFFIX for
+        the first occurrence of a base, then first_suffix, first_suffix + 1...
+        """
+        fps = np.array(fps, dtype=np.uint64, ndmin=1)
+        fps[fps == EMPTY] = 1
+        n = len(fps)
+
+        # Grouping the batch by fingerprint: rank of every row in its group
+        order = np.argsort(fps, kind="stable")
+        ordered = fps[order]
+        first = np.ones(n, dtype=bool)
+        first[1:] = ordered[1:] != ordered[:-1]
+        starts = np.flatnonzero(first)
+        group = np.cumsum(first) - 1
+
+        # Occurrences of every distinct fingerprint in earlier batches
+        keys = ordered[starts]
+        sizes = np.diff(np.append(starts, n))
+        before = np.empty(len(keys), dtype=np.int64)
+        partition = (keys >> np.uint64(32)) % np.uint64(len(self._tables))
+        for p, table in enumerate(self._tables):
+            rows = np.flatnonzero(partition == p)
+            if len(rows):
+                before[rows] = table.add(keys[rows], sizes[rows])
+
+        seen = np.empty(n, dtype=np.int64)
+        seen[order] = before[group] + np.arange(n) - starts[group]
+
+        repeated = seen > 0
+        self._allocated += len(fps)
+        self._collisions += int(repeated.sum())
+        self._bases_with_collisions += int((seen == 1).sum())
+        if repeated.any():
+            self._max_suffix = max(self._max_suffix, int(seen.max()) + self._first_suffix - 1)
+
+        return np.where(repeated, seen + self._first_suffix - 1, NO_SUFFIX).astype(np.int32)
+
+    def stats(self):
+        """
+        Collision statistics of the values numbered so far.
+        """
+        return {
+            "allocated": self._allocated,
+            "collisions": self._collisions,
+            "collision_rate": self._collisions / self._allocated if self._allocated else 0.0,
+            "probes": self._collisions,
+            "bases_with_collisions": self._bases_with_collisions,
+            "max_suffix": self._max_suffix,
+        }
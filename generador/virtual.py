@@ -0,0 +1,143 @@
+"""
+Lazy virtual columns: derived fields kept as compact parameters.
+
+Columns that can be recomputed from other columns are not stored as
+strings. An email is its name plus a separator code (int8) and the number
+the allocator added (int32); an education level is nothing more than the
+dob it comes from. Without pyarrow, compact ids stay as their raw bytes
+the same way. A LazyFrame holds the stored columns and computes the
+virtual ones when they are accessed, and the writers render it slice by
+slice, so a full string column never exists at once.
+"""
+import pandas as pd
+
+from generador.emails import DOMAIN, render_emails
+from generador.ids import uuid_hex
+
+# Rows rendered at a time when a LazyFrame is written
+SLICE_ROWS = 50_000
+
+
+class IdColumn:
+    """
+    Ids kept as their (n, 16) raw bytes, rendered as hex text on access.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @property
+    def nbytes(self):
+        return self.raw.nbytes
+
+    def values(self, df, rows=slice(None)):
+        return uuid_hex(self.raw[rows])
+
+
+class EmailColumn:
+    """
+    Email addresses stored as separator codes and allocated numbers.
+    """
+
+    def __init__(self, codes, suffixes, source="name", domain=DOMAIN):
+        self.codes = codes
+        self.suffixes = suffixes
+        self.source = source
+        self.domain = domain
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.suffixes.nbytes
+
+    def values(self, df, rows=slice(None)):
+        """
+        Addresses of the rows of df, a slice of the stored columns.
+        """
+        return render_emails(df[self.source], self.codes[rows], self.suffixes[rows], self.domain)
+
+
+class ConditionalColumn:
+    """
+    Column of a deterministic table of a JointModel, such as education,
+    computed from its parent (here the dob) on access.
+    """
+
+    def __init__(self, model, name, now=None):
+        if not model[name].deterministic:
+            raise ValueError("only tables with one value per parent can be virtual")
+
+        self.model = model
+        self.name = name
+        self.now = now
+
+    @property
+    def nbytes(self):
+        return 0
+
+    def values(self, df, rows=slice(None)):
+        # A lookup table needs no random numbers
+        return self.model.sample(self.name, None, df, self.now)
+
+
+class LazyFrame:
+    """
+    DataFrame whose virtual columns are computed when accessed.
+
+    Reading a column returns a Series, as with a DataFrame; materialize()
+    returns a real DataFrame of some or all rows, in column order.
+    """
+
+    def __init__(self, df, virtual, columns=None):
+        self.df = df
+        self.virtual = dict(virtual)
+        self.columns = list(columns) if columns is not None else list(df.columns) + list(virtual)
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def index(self):
+        return self.df.index
+
+    def __getitem__(self, name):
+        if name in self.virtual:
+            return pd.Series(self.virtual[name].values(self.df), index=self.df.index, name=name)
+
+        return self.df[name]
+
+    def __setitem__(self, name, values):
+        # New columns are stored ones, written after the others
+        self.df[name] = values
+        if name not in self.columns:
+            self.columns.append(name)
+
+    def materialize(self, start=0, stop=None):
+        """
+        DataFrame of rows [start, stop) with every column.
+        """
+        rows = slice(start, stop)
+        stored = self.df.iloc[rows]
+        out = pd.DataFrame(index=stored.index)
+
+        for name in self.columns:
+            if name in self.virtual:
+                out[name] = self.virtual[name].values(stored, rows)
+            else:
+                out[name] = stored[name]
+
+        return out
+
+    def materialized(self, rows=SLICE_ROWS):
+        """
+        Yields the frame as DataFrames of at most rows rows.
+        """
+        for start in range(0, len(self), rows):
+            yield self.materialize(start, start + rows)
+
+    def memory_usage(self):
+        """
+        Bytes held: the stored columns plus the virtual column parameters.
+        """
+        stored = int(self.df.memory_usage(deep=True).sum())
+
+        return stored + sum(int(column.nbytes) for column in self.virtual.values())
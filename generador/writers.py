@@ -0,0 +1,623 @@
+"""
+Pluggable writers that append chunks of a DataFrame to an output file.
+
+Every writer takes chunks through write() and finishes the file on
+close(); they are also context managers. Columnar backends (Parquet and
+Arrow IPC / Feather) need pyarrow, which is only imported when used;
+SqliteWriter bulk-loads a table of a SQLite database.
+BackgroundWriter runs any of them on a thread so that writing a chunk
+overlaps with generating the next one.
+"""
+import os
+import queue
+import threading
+
+# Default rows per Parquet row group / Arrow record batch
+DEFAULT_ROW_GROUP_SIZE = 1_000_000
+
+# Rows of an xlsx sheet, header included
+EXCEL_MAX_ROWS = 1_048_576
+
+# Rows per SQLite transaction
+DEFAULT_TRANSACTION_ROWS = 1_000_000
+
+# Connection settings of a SQLite bulk load: no rollback journal, no fsync
+# and a 256 MB page cache. A crash during the load leaves a broken file,
+# which is fine for data that can be generated again.
+BULK_PRAGMAS = {
+    "journal_mode": "OFF",
+    "synchronous": "OFF",
+    "cache_size": -262144,
+    "temp_store": "MEMORY",
+}
+
+
+class Writer:
+    """
+    Base class of the writers.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+
+    def write(self, chunk):
+        # A LazyFrame (generador.virtual) is rendered slice by slice
+        if hasattr(chunk, "materialized"):
+            for part in chunk.materialized():
+                self.write(part)
+            return
+
+        self._write(chunk)
+        self.rows += len(chunk)
+
+    def _write(self, chunk):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BackgroundWriter(Writer):
+    """
+    Runs another writer on a background thread fed by a bounded queue.
+
+    write() returns as soon as the chunk is queued, so the next chunk is
+    generated while this one is serialized and compressed. It blocks while
+    queue_size chunks are already waiting, which keeps memory bounded when
+    the disk is slower than the generation. An error of the writer thread
+    is raised by the next write() or by close().
+    """
+
+    def __init__(self, writer, queue_size=2, metrics=None):
+        from generador.instrument import NO_METRICS
+
+        super().__init__(writer.path)
+        self.writer = writer
+
+        # "export" is timed on the writer thread (without allocations, see
+        # generador.instrument), "export_wait" is the time the producer
+        # spends blocked on a full queue. Written rows are passed on to the
+        # metrics by the producer, which draws the progress bar.
+        self.metrics = metrics or NO_METRICS
+        self._written = 0
+        self._reported = 0
+
+        self._queue = queue.Queue(queue_size)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+
+            # After an error the rest is only drained, so write() never blocks
+            if self._error is not None:
+                continue
+
+            try:
+                with self.metrics.stage("export", len(chunk)):
+                    self.writer.write(chunk)
+                self._written += len(chunk)
+            except BaseException as exc:
+                self._error = exc
+
+    def _raise(self):
+        if self._error is not None:
+            raise self._error
+
+    def _advance(self):
+        written = self._written
+        if written > self._reported:
+            self.metrics.advance(written - self._reported)
+            self._reported = written
+
+    def write(self, chunk):
+        self._raise()
+
+        with self.metrics.stage("export_wait", len(chunk)):
+            self._queue.put(chunk)
+        self.rows += len(chunk)
+        self._advance()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self.writer.close()
+        self._advance()
+
+        self._raise()
+
+
+def _text_ids(chunk):
+    """
+    Copy of the chunk with binary id columns rendered as uuid.hex text.
+    """
+    from generador.ids import id_bytes, is_binary_id, uuid_hex
+
+    binary = [name for name in chunk.columns if is_binary_id(chunk[name])]
+    if not binary:
+        return chunk
+
+    chunk = chunk.copy(deep=False)
+    for name in binary:
+        chunk[name] = uuid_hex(id_bytes(chunk[name]))
+
+    return chunk
+
+
+class CsvWriter(Writer):
+    """
+    Plain CSV, with the index column df.to_csv writes by default.
+
+    With append=True the rows are added to the end of an existing file,
+    without a header.
+    """
+
+    def __init__(self, path, index=True, date_format=None, append=False):
+        super().__init__(path)
+        self.index = index
+        self.date_format = date_format
+        self.append = append
+        self._file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+
+    def _write(self, chunk):
+        chunk = _text_ids(chunk)
+        chunk.to_csv(
+            self._file,
+            header=(self.rows == 0 and not self.append),
+            index=self.index,
+            date_format=self.date_format,
+        )
+
+    def close(self):
+        self._file.close()
+
+
+class ExcelWriter(Writer):
+    """
+    Single-sheet xlsx file streamed row by row.
+
+    Uses xlsxwriter in constant_memory mode: every row is flushed to disk
+    once written, so memory stays flat up to the Excel row limit.
+    """
+
+    def __init__(self, path, sheet_name="Hoja 1", index=False):
+        import xlsxwriter
+
+        super().__init__(path)
+        self.index = index
+        self._workbook = xlsxwriter.Workbook(
+            path, {"constant_memory": True, "nan_inf_to_errors": True}
+        )
+        self._sheet = self._workbook.add_worksheet(sheet_name)
+        self._formats = {}
+
+    def _date_format(self, values):
+        """
+        Cell format of a datetime column: with time, or date only.
+        """
+        dates_only = (values.dropna() == values.dropna().dt.normalize()).all()
+        num_format = "yyyy-mm-dd" if dates_only else "yyyy-mm-dd hh:mm:ss"
+
+        if num_format not in self._formats:
+            self._formats[num_format] = self._workbook.add_format({"num_format": num_format})
+
+        return self._formats[num_format]
+
+    def _write(self, chunk):
+        import pandas as pd
+
+        chunk = _text_ids(chunk)
+        if self.index:
+            chunk = chunk.reset_index()
+
+        # Header row, then one row per record; a row counts the header
+        if self.rows == 0:
+            self._sheet.write_row(0, 0, [str(c) for c in chunk.columns])
+        first = self.rows + 1
+
+        if first + len(chunk) > EXCEL_MAX_ROWS:
+            raise ValueError(
+                "an xlsx sheet holds at most %d rows" % (EXCEL_MAX_ROWS - 1)
+            )
+
+        # Python values per column, plus the cell format of datetime columns
+        columns = []
+        formats = []
+        for name in chunk.columns:
+            values = chunk[name]
+
+            if pd.api.types.is_datetime64_any_dtype(values):
+                formats.append(self._date_format(values))
+                columns.append(values.astype(object).where(values.notna(), None).tolist())
+            else:
+                formats.append(None)
+                columns.append(values.tolist())
+
+        # constant_memory only accepts rows written in order
+        for row, record in enumerate(zip(*columns), first):
+            for col, value in enumerate(record):
+                if formats[col] is None:
+                    self._sheet.write(row, col, value)
+                elif value is not None:
+                    self._sheet.write_datetime(row, col, value, formats[col])
+
+    def close(self):
+        self._workbook.close()
+
+
+class _ArrowWriter(Writer):
+    """
+    Shared part of the Arrow based writers: buffers chunks into row groups.
+    """
+
+    def __init__(self, path, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        super().__init__(path)
+        self.row_group_size = row_group_size
+        self.schema = None
+        self._buffer = []
+        self._buffered = 0
+
+    def _to_table(self, chunk):
+        import pyarrow as pa
+
+        # Categorical columns become dictionary encoded arrays. The pandas
+        # metadata is dropped: every dtype is rebuilt from the Arrow types
+        # anyway, and pandas cannot read it back for binary id columns
+        table = pa.Table.from_pandas(chunk, preserve_index=False).replace_schema_metadata(None)
+
+        if self.schema is None:
+            self.schema = table.schema
+            self._open(self.schema)
+
+        return table.cast(self.schema)
+
+    def _write(self, chunk):
+        self._buffer.append(self._to_table(chunk))
+        self._buffered += len(chunk)
+
+        if self._buffered >= self.row_group_size:
+            self._flush()
+
+    def _flush(self, final=False):
+        """
+        Writes the full row groups buffered so far, and the rest if final.
+        """
+        import pyarrow as pa
+
+        if not self._buffer:
+            return
+
+        table = pa.concat_tables(self._buffer)
+        size = self.row_group_size
+
+        full = len(table) if final else len(table) - len(table) % size
+        for offset in range(0, full, size):
+            self._write_table(table.slice(offset, min(size, full - offset)))
+
+        # Keeping the partial row group for the next chunks
+        rest = table.slice(full)
+        self._buffer = [rest] if len(rest) else []
+        self._buffered = len(rest)
+
+    def close(self):
+        self._flush(final=True)
+        self._close()
+
+    def _open(self, schema):
+        raise NotImplementedError
+
+    def _write_table(self, table):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+
+class ParquetWriter(_ArrowWriter):
+    """
+    Parquet file with dictionary encoded categorical columns.
+    """
+
+    def __init__(self, path, row_group_size=DEFAULT_ROW_GROUP_SIZE, compression="zstd"):
+        super().__init__(path, row_group_size)
+        self.compression = compression
+        self._writer = None
+
+    def _open(self, schema):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        dictionary = [f.name for f in schema if pa.types.is_dictionary(f.type)]
+
+        self._writer = pq.ParquetWriter(
+            self.path,
+            schema,
+            compression=self.compression,
+            use_dictionary=dictionary or False,
+        )
+
+    def _write_table(self, table):
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class FeatherWriter(_ArrowWriter):
+    """
+    Arrow IPC file (Feather v2), one record batch per row group.
+    """
+
+    def __init__(self, path, row_group_size=DEFAULT_ROW_GROUP_SIZE, compression="lz4"):
+        super().__init__(path, row_group_size)
+        self.compression = compression
+        self._sink = None
+        self._writer = None
+
+    def _open(self, schema):
+        import pyarrow as pa
+
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        self._sink = pa.OSFile(self.path, "wb")
+        self._writer = pa.ipc.new_file(self._sink, schema, options=options)
+
+    def _write_table(self, table):
+        self._writer.write_table(table, max_chunksize=self.row_group_size)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+
+
+class SqliteWriter(Writer):
+    """
+    Table of a SQLite database, loaded in bulk.
+
+    The table is created from the columns and dtypes of the first chunk
+    (INTEGER, REAL, BLOB for binary ids, TEXT for the rest; dates as ISO
+    text). Chunks go in with executemany, in transactions of
+    transaction_rows rows, under the BULK_PRAGMAS settings. The primary key
+    and unique indexes are only built once the load is over, which is much
+    faster than keeping them up to date row by row; SQLite cannot add a
+    PRIMARY KEY to an existing table, so the key is a unique index. Columns
+    in indexes get a plain index, built at the same time.
+    """
+
+    def __init__(self, path, table="users", primary_key="id", unique=("email",), indexes=(),
+                 if_exists="fail", transaction_rows=DEFAULT_TRANSACTION_ROWS, pragmas=None):
+        import sqlite3
+
+        if if_exists not in ("fail", "replace", "append"):
+            raise ValueError("if_exists must be 'fail', 'replace' or 'append'")
+
+        super().__init__(path)
+        self.table = table
+        self.primary_key = primary_key
+        self.unique = tuple(unique)
+
+        # Plain indexes, such as the foreign keys of generador.relational
+        self.indexes = tuple(indexes)
+        self.if_exists = if_exists
+        self.transaction_rows = transaction_rows
+
+        # Autocommit mode: transactions are opened and closed by hand
+        self._db = sqlite3.connect(path, isolation_level=None)
+        for name, value in dict(BULK_PRAGMAS, **(pragmas or {})).items():
+            self._db.execute("PRAGMA %s = %s" % (name, value))
+
+        # Refused on opening, before any chunk is generated
+        if if_exists == "fail" and self._exists():
+            self._db.close()
+            raise ValueError("table %r already exists in %s" % (self.table, self.path))
+
+        self._insert = None
+        self._columns = None
+        self._pending = 0
+
+    def _exists(self):
+        return self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.table,)
+        ).fetchone() is not None
+
+    def _create(self, chunk):
+        import pandas as pd
+
+        from generador.ids import is_binary_id
+
+        exists = self._exists()
+        if exists and self.if_exists == "replace":
+            self._db.execute("DROP TABLE %s" % _quote(self.table))
+            exists = False
+
+        columns = []
+        for name in chunk.columns:
+            values = chunk[name]
+            if is_binary_id(values):
+                sql_type = "BLOB"
+            elif pd.api.types.is_bool_dtype(values) or pd.api.types.is_integer_dtype(values):
+                sql_type = "INTEGER"
+            elif pd.api.types.is_float_dtype(values):
+                sql_type = "REAL"
+            else:
+                sql_type = "TEXT"
+            columns.append("%s %s" % (_quote(name), sql_type))
+
+        if not exists:
+            self._db.execute("CREATE TABLE %s (%s)" % (_quote(self.table), ", ".join(columns)))
+
+        self._columns = list(chunk.columns)
+        self._insert = "INSERT INTO %s (%s) VALUES (%s)" % (
+            _quote(self.table),
+            ", ".join(_quote(name) for name in self._columns),
+            ", ".join("?" * len(self._columns)),
+        )
+
+    def _values(self, values):
+        """
+        Python values of a column, as sqlite3 stores them.
+        """
+        import numpy as np
+        import pandas as pd
+
+        from generador.ids import id_bytes, is_binary_id
+        from generador.timestamps import DATE_FORMAT, TIME_FORMAT, format_datetimes
+
+        if is_binary_id(values):
+            return np.ascontiguousarray(id_bytes(values)).view("V16").ravel().tolist()
+
+        if pd.api.types.is_datetime64_any_dtype(values):
+            present = values.dropna()
+            dates_only = (present == present.dt.normalize()).all()
+            text = format_datetimes(values, DATE_FORMAT if dates_only else TIME_FORMAT)
+            return pd.Series(text, dtype=object).where(values.notna().to_numpy(), None).tolist()
+
+        if pd.api.types.is_bool_dtype(values):
+            return values.astype(np.int8).tolist()
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+
+        return values.where(values.notna(), None).tolist()
+
+    def _write(self, chunk):
+        if self._insert is None:
+            self._create(chunk)
+
+        rows = zip(*(self._values(chunk[name]) for name in self._columns))
+
+        if self._pending == 0:
+            self._db.execute("BEGIN")
+        self._db.executemany(self._insert, rows)
+        self._pending += len(chunk)
+
+        if self._pending >= self.transaction_rows:
+            self._db.execute("COMMIT")
+            self._pending = 0
+
+    def close(self):
+        if self._pending:
+            self._db.execute("COMMIT")
+            self._pending = 0
+
+        # Building the indexes once, over the whole loaded table
+        if self._columns is not None:
+            keys = [(self.primary_key, "pk")] if self.primary_key else []
+            keys += [(name, "unique") for name in self.unique]
+            keys += [(name, "idx") for name in self.indexes]
+
+            for name, kind in keys:
+                if name in self._columns:
+                    self._db.execute("CREATE %sINDEX IF NOT EXISTS %s ON %s (%s)" % (
+                        "" if kind == "idx" else "UNIQUE ",
+                        _quote("%s_%s_%s" % (self.table, name, kind)),
+                        _quote(self.table),
+                        _quote(name),
+                    ))
+
+        self._db.close()
+
+
+def _quote(name):
+    """
+    SQL identifier in double quotes.
+    """
+    return '"%s"' % str(name).replace('"', '""')
+
+
+# Registered backends and the file extensions that select them
+WRITERS = {
+    "csv": CsvWriter,
+    "xlsx": ExcelWriter,
+    "parquet": ParquetWriter,
+    "feather": FeatherWriter,
+    "sqlite": SqliteWriter,
+}
+
+EXTENSIONS = {
+    ".csv": "csv",
+    ".xlsx": "xlsx",
+    ".parquet": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".sqlite3": "sqlite",
+}
+
+
+def register_writer(name, cls, *extensions):
+    """
+    Adds a backend, optionally selected by the given file extensions.
+    """
+    WRITERS[name] = cls
+    for extension in extensions:
+        EXTENSIONS[extension] = name
+
+
+def output_format(path, format=None):
+    """
+    The given format, checked, or the one guessed from the extension.
+    """
+    if format is None:
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in EXTENSIONS:
+            raise ValueError("cannot guess the output format of %r" % path)
+        format = EXTENSIONS[extension]
+
+    if format not in WRITERS:
+        raise ValueError(
+            "unknown format %r, expected one of %s" % (format, ", ".join(sorted(WRITERS)))
+        )
+
+    return format
+
+
+def open_writer(path, format=None, **options):
+    """
+    Writer for the given format, guessed from the extension if not given.
+    """
+    return WRITERS[output_format(path, format)](path, **options)
+
+
+def write_chunks(chunks, path, format=None, metrics=None, background=False, queue_size=2,
+                 **options):
+    """
+    Writes every chunk through a single writer. Returns the number of rows.
+
+    With a Metrics object, every write is timed as the "export" stage. With
+    background, chunks are written on a BackgroundWriter thread holding at
+    most queue_size chunks, while the next ones are generated.
+    """
+    from generador.instrument import NO_METRICS
+
+    metrics = metrics or NO_METRICS
+
+    writer = open_writer(path, format, **options)
+    if background:
+        writer = BackgroundWriter(writer, queue_size, metrics)
+
+    with writer:
+        for chunk in chunks:
+            if background:
+                # Timed and counted on the writer thread
+                writer.write(chunk)
+                continue
+
+            with metrics.stage("export", len(chunk)):
+                writer.write(chunk)
+            metrics.advance(len(chunk))
+
+    return writer.rows
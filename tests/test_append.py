@@ -0,0 +1,36 @@
+"""
+append(): new rows unique against the existing file, with or without its index.
+"""
+import os
+
+import pandas as pd
+
+from generador.append import AppendIndex, append, index_path
+from generador.ids import SortedFingerprints
+from generador.pipeline import generate
+
+
+def test_appended_rows_stay_unique(tmp_path):
+    path = str(tmp_path / "users.csv")
+    generate(path, 800, chunk_size=300, seed=1, binary_ids=False)
+
+    assert append(path, 500, seed=2, chunk_size=200) == 1300
+
+    # Rebuilt by scanning the file
+    os.remove(index_path(path))
+    assert append(path, 200, seed=3) == 1500
+
+    df = pd.read_csv(path)
+    assert len(df) == 1500
+    assert df["id"].is_unique
+    assert df["email"].is_unique
+    assert len(AppendIndex.load(path).emails) == 1500
+
+
+def test_sorted_fingerprints_marks_repeats():
+    fps = SortedFingerprints([9, 3])
+
+    assert fps.add_fingerprints([5, 3, 5, 2**64 - 1]).tolist() == [False, True, True, False]
+    assert fps.values.tolist() == [3, 5, 9, 2**64 - 1]
+    assert 2**64 - 1 in fps
+    assert 4 not in fps
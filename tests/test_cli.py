@@ -0,0 +1,87 @@
+"""
+The datos command line.
+"""
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code):
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+
+
+def test_schema_listing_imports_neither_numpy_nor_pandas():
+    out = _run(
+        "import sys\n"
+        "from generador.cli import main\n"
+        "main(['schema'])\n"
+        "print('numpy' in sys.modules, 'pandas' in sys.modules)\n"
+    )
+
+    assert out.splitlines()[0] == "users"
+    assert out.splitlines()[-1] == "False False"
+
+
+def test_existing_sqlite_table_is_a_usage_error(tmp_path, capsys):
+    from generador.cli import main
+
+    path = str(tmp_path / "users.db")
+    main(["generate", "--rows", "20", "--seed", "1", "-o", path])
+
+    with pytest.raises(SystemExit):
+        main(["generate", "--rows", "20", "--seed", "1", "-o", path])
+    assert "already exists" in capsys.readouterr().err
+
+    main(["generate", "--rows", "30", "--seed", "1", "-o", path, "--if-exists", "replace"])
+    main(["generate", "--rows", "20", "--seed", "2", "-o", path, "--if-exists", "append"])
+
+    with sqlite3.connect(path) as db:
+        assert db.execute("SELECT COUNT(*) FROM users").fetchone() == (50,)
+
+
+def test_if_exists_needs_a_sqlite_output(tmp_path, capsys):
+    from generador.cli import main
+
+    with pytest.raises(SystemExit):
+        main(["generate", "--rows", "5", "-o", str(tmp_path / "u.csv"), "--if-exists", "append"])
+    assert "only for SQLite" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["--rows", "0"], "positive integer"),
+    (["--rows", "-5"], "positive integer"),
+    (["--rows", "5", "-o", "z.json"], "cannot guess the output format"),
+    (["--rows", "5", "--columns", "id", "--workers", "2"], "--workers"),
+    (["--rows", "5", "--bloom-error", "0.01"], "--unique-index"),
+])
+def test_bad_generate_options_are_usage_errors(argv, message, tmp_path, monkeypatch, capsys):
+    from generador.cli import main
+
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(SystemExit):
+        main(["generate"] + argv)
+
+    assert message in capsys.readouterr().err
+    assert os.listdir(tmp_path) == []
+
+
+def test_trace_memory_reports_allocations(tmp_path):
+    from generador.cli import main
+
+    report = str(tmp_path / "metrics.json")
+    main([
+        "generate", "--rows", "50", "-o", str(tmp_path / "u.csv"),
+        "--metrics", report, "--trace-memory",
+    ])
+
+    with open(report) as f:
+        stages = json.load(f)["stages"]
+    assert all("peak_bytes" in stats for stats in stages.values())
@@ -0,0 +1,23 @@
+"""
+The notebook's column functions, per row and per column.
+"""
+import numpy as np
+import pandas as pd
+
+from generador import datos
+
+
+def test_single_values_give_single_values():
+    datos.seed(3)
+
+    assert isinstance(datos.name_gen("male"), str)
+    assert isinstance(datos.makeBio(True), str)
+    assert datos.getEducation("1990-01-01", now=pd.Timestamp("2024-01-01")) == "employed"
+
+
+def test_columns_give_columns():
+    datos.seed(3)
+
+    assert len(datos.name_gen(pd.Series(["male", "female", "na"]))) == 3
+    assert len(datos.makeBio(np.array([True, False]))) == 2
+    assert len(datos.getEducation(pd.Series(pd.to_datetime(["1990-01-01", "2010-01-01"])))) == 2
@@ -0,0 +1,133 @@
+"""
+FingerprintSet: batched inserts, growth, persistence and the Bloom front.
+"""
+import os
+
+import numpy as np
+
+from generador.diskindex import DiskUniqueIndex, FingerprintSet
+
+
+def _open(tmp_path, **kwargs):
+    return FingerprintSet(str(tmp_path / "set.npy"), capacity=16, **kwargs)
+
+
+def test_add_marks_repeats_within_a_batch(tmp_path):
+    fps = _open(tmp_path)
+
+    # 0 is stored as 1, so it repeats 1
+    taken = fps.add([5, 7, 5, 0, 1, 7])
+
+    assert taken.tolist() == [False, False, True, False, True, True]
+    assert len(fps) == 3
+    assert fps.contains([5, 7, 1, 9]).tolist() == [True, True, True, False]
+
+
+def test_add_resolves_keys_landing_on_the_same_slot(tmp_path):
+    fps = _open(tmp_path)
+    size = len(fps.table)
+
+    # Same home slot for all of them
+    keys = [3 + i * size for i in range(8)]
+    taken = fps.add(keys)
+
+    assert not taken.any()
+    assert fps.contains(keys).all()
+    assert fps.add(keys).all()
+    assert len(fps) == 8
+
+
+def test_grow_keeps_every_fingerprint(tmp_path):
+    fps = _open(tmp_path)
+    capacity = len(fps.table)
+    keys = np.random.default_rng(0).integers(1, 2**63, size=5000, dtype=np.uint64)
+
+    for batch in np.array_split(keys, 7):
+        fps.add(batch)
+
+    assert len(fps.table) > capacity
+    assert len(fps) == len(np.unique(keys))
+    assert fps.contains(keys).all()
+    assert not fps.contains(keys + np.uint64(1)).any()
+
+
+def test_reopen_keeps_the_set(tmp_path):
+    keys = np.arange(1, 300, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    fps = _open(tmp_path)
+    fps.add(keys)
+    fps.flush()
+    del fps
+
+    fps = _open(tmp_path)
+
+    assert len(fps) == len(keys)
+    assert fps.contains(keys).all()
+    assert fps.add(keys).all()
+    assert fps.add_one(12345) is False
+    assert 12345 in fps
+
+
+def test_bloom_is_rebuilt_after_a_run_without_it(tmp_path):
+    fps = _open(tmp_path, bloom_error=0.01)
+    fps.add([111])
+    fps.flush()
+    del fps
+
+    fps = _open(tmp_path)
+    fps.add([222])
+    fps.flush()
+    del fps
+
+    fps = _open(tmp_path, bloom_error=0.01)
+
+    assert fps.contains([111, 222]).all()
+    assert 222 in fps
+
+
+def test_bloom_is_rebuilt_for_another_rate(tmp_path):
+    fps = _open(tmp_path, bloom_error=0.1)
+    fps.add(np.arange(1, 100, dtype=np.uint64))
+    fps.flush()
+    del fps
+
+    fps = _open(tmp_path, bloom_error=0.001)
+
+    assert fps.bloom.contains(np.arange(1, 100, dtype=np.uint64)).all()
+    assert fps.contains(np.arange(1, 100, dtype=np.uint64)).all()
+
+
+def test_bloom_in_sync_is_reused(tmp_path):
+    fps = _open(tmp_path, bloom_error=0.01)
+    fps.add(np.arange(1, 50, dtype=np.uint64))
+    fps.flush()
+    bits = np.array(fps.bloom.bits)
+    del fps
+
+    # A run without the filter that adds nothing leaves it in sync
+    _open(tmp_path).flush()
+    fps = _open(tmp_path, bloom_error=0.01)
+
+    assert fps._bloom_meta["bloom_count"] == len(fps)
+    assert np.array_equal(fps.bloom.bits, bits)
+
+
+def test_unique_index_puts_the_bloom_front_on_ids_and_emails(tmp_path):
+    index = DiskUniqueIndex(str(tmp_path / "index"), capacity=64, bloom_error=0.01)
+    index.flush()
+
+    assert index.ids.fps.bloom is not None
+    assert index.emails.fps.bloom is not None
+    assert os.path.exists(str(tmp_path / "index" / "ids.npy.bloom.npy"))
+
+
+def test_add_one_sets_the_bloom_bits_of_add(tmp_path):
+    keys = np.random.default_rng(1).integers(1, 2**63, size=200, dtype=np.uint64)
+    batch = FingerprintSet(str(tmp_path / "batch.npy"), capacity=1000, bloom_error=0.01)
+    single = FingerprintSet(str(tmp_path / "single.npy"), capacity=1000, bloom_error=0.01)
+
+    batch.add(keys)
+    for key in keys:
+        single.add_one(key)
+
+    assert np.array_equal(single.bloom.bits, batch.bloom.bits)
+    assert single.contains(keys).all()
@@ -0,0 +1,32 @@
+"""
+FeistelPermutation is a bijection of [0, size).
+"""
+import numpy as np
+import pytest
+
+from generador.permutation import FeistelPermutation, mix, mix_int
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 1000, 4097])
+def test_permutation_is_a_bijection(size):
+    images = FeistelPermutation(size, seed=42)(np.arange(size))
+
+    assert np.array_equal(np.sort(images), np.arange(size))
+
+
+def test_permutation_depends_on_the_seed():
+    first = FeistelPermutation(1000, seed=1)(np.arange(1000))
+    second = FeistelPermutation(1000, seed=2)(np.arange(1000))
+
+    assert not np.array_equal(first, second)
+
+
+def test_out_of_range_index():
+    with pytest.raises(IndexError):
+        FeistelPermutation(10, seed=1)([10])
+
+
+def test_mix_int_matches_mix():
+    x = np.random.default_rng(0).integers(0, 2**63, size=100, dtype=np.uint64) * np.uint64(3)
+
+    assert [mix_int(int(v)) for v in x] == [int(v) for v in mix(x)]
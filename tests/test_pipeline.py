@@ -0,0 +1,35 @@
+"""
+Output of the chunked and multi-process pipelines.
+"""
+import datetime
+
+from generador.parallel import generate_parallel
+from generador.pipeline import generate
+
+NOW = datetime.datetime(2024, 1, 1)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_lazy_and_eager_output_are_identical(tmp_path):
+    eager = str(tmp_path / "eager.csv")
+    lazy = str(tmp_path / "lazy.csv")
+
+    generate(eager, 3000, chunk_size=700, seed=3, now=NOW)
+    generate(lazy, 3000, chunk_size=700, seed=3, now=NOW, lazy=True)
+
+    assert _read(lazy) == _read(eager)
+
+
+def test_shards_do_not_depend_on_the_worker_count(tmp_path):
+    outputs = []
+    for workers in (1, 2, 3):
+        path = str(tmp_path / ("users_%d.csv" % workers))
+        generate_parallel(path, 2500, seed=5, workers=workers, shard_size=600, now=NOW)
+        outputs.append(_read(path))
+
+    assert outputs[1] == outputs[0]
+    assert outputs[2] == outputs[0]
@@ -0,0 +1,25 @@
+"""
+CounterGenerator: any row range equals the same rows of a full run.
+"""
+import pandas as pd
+
+from generador.seeding import CounterGenerator
+
+
+def test_row_ranges_match_a_full_run():
+    generator = CounterGenerator(seed=7)
+    full = pd.concat(list(generator.chunks(300, chunk_size=300)))
+
+    for start, stop in [(0, 1), (17, 90), (150, 151), (299, 300)]:
+        part = CounterGenerator(seed=7).rows(start, stop)
+        pd.testing.assert_frame_equal(part, full.iloc[start:stop])
+
+
+def test_chunking_does_not_change_the_rows():
+    generator = CounterGenerator(seed=7)
+
+    whole = pd.concat(list(generator.chunks(300, chunk_size=300)))
+    chunked = pd.concat(list(generator.chunks(300, chunk_size=64)))
+
+    pd.testing.assert_frame_equal(chunked, whole)
+    assert whole["email"].is_unique
@@ -0,0 +1,42 @@
+"""
+Email numbering: SuffixCounter against UniqueAllocator.
+"""
+import numpy as np
+
+from generador.emails import add_suffixes, allocate_emails, base_fingerprints
+from generador.unique import SuffixCounter, UniqueAllocator
+
+
+def _bases(rng, n):
+    firsts = np.array(["ana", "luis", "marta", "jose"])
+    lasts = np.array(["diaz", "gil", "ruiz"])
+    seps = np.array([".", "_"])
+
+    picks = rng.integers(0, [len(firsts), len(seps), len(lasts)], size=(n, 3))
+
+    return [firsts[a] + seps[b] + lasts[c] for a, b, c in picks]
+
+
+def test_suffix_counter_numbers_like_the_allocator():
+    rng = np.random.default_rng(0)
+    allocator = UniqueAllocator()
+    counter = SuffixCounter(partitions=4)
+
+    # Across calls, as chunks share one counter
+    for n in (50, 1, 300):
+        bases = _bases(rng, n)
+        expected = allocate_emails(bases, allocator)
+        emails = add_suffixes(bases, counter.number(base_fingerprints(bases)))
+
+        assert list(emails) == expected
+
+    assert len(set(expected)) == len(expected)
+
+
+def test_suffix_counter_does_not_depend_on_partitions():
+    bases = _bases(np.random.default_rng(1), 500)
+    fps = base_fingerprints(bases)
+
+    numbers = [SuffixCounter(partitions=p).number(fps) for p in (1, 3, 16)]
+
+    assert all(np.array_equal(numbers[0], other) for other in numbers[1:])